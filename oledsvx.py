@@ -6,44 +6,57 @@
 
 # options in oledsvx.ini
 
-import subprocess
+import time
+# taken before other imports, so --startup-profile covers them too
+startup_time = time.perf_counter()
+
 import argparse
+import asyncio
+import codecs
 import configparser
+import ctypes
+import errno
 import glob
 import json
 import logging
+import math
 import os
-import psutil
 import re
+import select
 import signal
 import socket
+import struct
 import sys
 import threading
-import time
 
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timedelta
-from json.decoder import JSONDecodeError
-from luma.core.interface.serial import i2c
-from luma.core.render import canvas
+from luma.core.device import dummy
+from luma.core.error import DeviceNotFoundError
+from luma.core.interface.serial import noop
 from luma.oled.device import sh1106, ssd1306, ssd1309
 from pathlib import Path
-from PIL import ImageFont, Image
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from PIL import ImageDraw, ImageFont, Image
+
+logger = logging.getLogger('oled')
+shutdown = threading.Event()
 
 def shutdown_signal_handler(signum, frame):
-    global shutdown
-    shutdown = True
+    shutdown.set()
 
 class Call:
+    __slots__ = ('caller', 'tgnum', 'tgname', 'state', 'entrytime')
+
+    allowed_states = ( 'start', 'stop' )
+
     def __init__(self, caller, tgnum, tgname, state, entrytime):
-        self.caller = caller
+        # the same few callsigns repeat on every line, keep one copy of each
+        self.caller = sys.intern(caller) if caller else caller
         self.tgnum = tgnum
         self.tgname = tgname
-        self.entrytime = entrytime
-        allowed_states = [ 'start', 'stop' ]
-        if state not in allowed_states:
-            raise Exception("Call() with unknown state '%s'. Supported states: %s." % (state, ", ".join(allowed_states)))
+        if state not in self.allowed_states:
+            raise Exception("Call() with unknown state '%s'. Supported states: %s." % (state, ", ".join(self.allowed_states)))
         self.state = state
         self.entrytime = entrytime
 
@@ -53,80 +66,874 @@ class Call:
     def __repr__(self):
         return self.__str__()
 
-class SvxLogMonitor:
-    class EventHandler(FileSystemEventHandler):
-        def __init__(self, monitor):
-            super().__init__()
-            self.monitor = monitor
-
-        def on_modified(self, event):
-            if event.src_path != self.monitor.logfile:
+class TalkerHistory:
+    """Last `size` transmissions and airtime per TG and per callsign over the last hour and day.
+
+    Transmissions are start/stop pairs kept in bounded deques, per window
+    totals are updated incrementally when a transmission enters or leaves
+    the window, so memory doesn't grow with uptime.
+    """
+
+    WINDOWS = (('hour', 3600), ('day', 86400))
+
+    def __init__(self, size=256, max_window=8192):
+        self.lock = threading.Lock()
+        self.size = size
+        self.max_window = max_window
+        # (caller, tgnum, start timestamp, duration in ms), integer totals
+        # don't accumulate rounding errors when records leave the window
+        self.recent = deque(maxlen=size)
+        self.active = {}
+        self.windows = {name: (seconds, deque(), {}, {}) for name, seconds in self.WINDOWS}
+
+    def resize(self, size):
+        """Keep last `size` transmissions from now on, newest ones are kept when shrinking."""
+        with self.lock:
+            self.size = size
+            self.recent = deque(self.recent, maxlen=size)
+
+    def add(self, call):
+        """Record talker start / stop, called from the log parser."""
+        timestamp = call.entrytime.timestamp()
+        with self.lock:
+            if call.state == 'start':
+                self.active.pop(call.caller, None)
+                self.active[call.caller] = (call.tgnum, timestamp)
+                # talkers which never stopped (e.g. lost stop line)
+                while len(self.active) > self.size:
+                    del self.active[next(iter(self.active))]
+                return
+            started = self.active.pop(call.caller, None)
+            if started is None or started[0] != call.tgnum or timestamp < started[1]:
                 return
-           
-            logger.debug(f"EventHandler: on modified event: {event}")
+            record = (call.caller, call.tgnum, started[1], round((timestamp - started[1]) * 1000))
+            self.recent.append(record)
+            for seconds, records, per_tg, per_caller in self.windows.values():
+                if len(records) == self.max_window:
+                    self.__remove(records.popleft(), per_tg, per_caller)
+                records.append(record)
+                per_tg[record[1]] = per_tg.get(record[1], 0) + record[3]
+                per_caller[record[0]] = per_caller.get(record[0], 0) + record[3]
+
+    @staticmethod
+    def __remove(record, per_tg, per_caller):
+        caller, tgnum, start, duration = record
+        for totals, key in ((per_tg, tgnum), (per_caller, caller)):
+            total = totals.get(key, 0) - duration
+            if total > 0:
+                totals[key] = total
+            else:
+                totals.pop(key, None)
+
+    def __expire(self, now):
+        for seconds, records, per_tg, per_caller in self.windows.values():
+            while records and records[0][2] + records[0][3] / 1000 < now - seconds:
+                self.__remove(records.popleft(), per_tg, per_caller)
+
+    def query(self, what="all", now=None):
+        """Return JSON serializable snapshot: recent transmissions and/or per window airtime."""
+        now = time.time() if now is None else now
+        with self.lock:
+            self.__expire(now)
+            result = {}
+            if what in ("all", "recent"):
+                result['recent'] = [
+                    {'caller': caller, 'tg': tgnum, 'start': datetime.fromtimestamp(start).isoformat(timespec='seconds'),
+                     'duration': duration / 1000}
+                    for caller, tgnum, start, duration in reversed(self.recent)]
+                result['active'] = [
+                    {'caller': caller, 'tg': tgnum, 'start': datetime.fromtimestamp(start).isoformat(timespec='seconds')}
+                    for caller, (tgnum, start) in self.active.items()]
+            for name, (seconds, records, per_tg, per_caller) in self.windows.items():
+                if what in ("all", name):
+                    result[name] = {
+                        'tg': {str(tg): total / 1000 for tg, total in sorted(per_tg.items(), key=lambda i: -i[1])},
+                        'callers': {caller: total / 1000 for caller, total in sorted(per_caller.items(), key=lambda i: -i[1])},
+                    }
+        if not result:
+            result['error'] = f"unknown query '{what}', use: all, recent, " + ", ".join(name for name, _ in self.WINDOWS)
+        return result
+
+class SocketServer:
+    """Local unix socket served on its own thread, `handle(conn)` answers each connection.
+
+    With `interval` set, `on_interval()` is called every that many seconds,
+    also while connections keep coming, `path` may be None then. Clients need write
+    permission to connect, `mode` and `group` (gid) are set on the socket.
+    """
+
+    def __init__(self, path, handle, name, interval=None, on_interval=None, mode=0o660, group=None):
+        self.path = path
+        self.handle = handle
+        self.name = name
+        self.interval = interval
+        self.on_interval = on_interval
+        self.stop_r, self.stop_w = os.pipe()
+        self.server = None
+        if path:
+            if os.path.exists(path):
+                os.unlink(path)
+            self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server.bind(path)
+            os.chmod(path, mode)
+            if group is not None:
+                os.chown(path, -1, group)
+            # replacement bound to the same path before stop() must stay
+            self.inode = os.stat(path).st_ino
+            self.server.listen(4)
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        fds = [self.stop_r] + ([self.server] if self.server else [])
+        deadline = time.monotonic() + self.interval if self.interval else None
+        while True:
+            timeout = max(deadline - time.monotonic(), 0) if deadline else None
+            ready = select.select(fds, [], [], timeout)[0]
+            if self.stop_r in ready:
+                return
+            if self.server in ready:
+                conn, _ = self.server.accept()
+                try:
+                    conn.settimeout(1)
+                    self.handle(conn)
+                except OSError as e:
+                    logger.debug(f"{self.name}: request failed: {e}")
+                finally:
+                    conn.close()
+            if deadline and time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.interval
+                if self.on_interval:
+                    self.on_interval()
+
+    def stop(self):
+        if self.stop_w is None:
+            return
+        os.write(self.stop_w, b'x')
+        self.thread.join()
+        os.close(self.stop_r)
+        os.close(self.stop_w)
+        self.stop_w = None
+        if self.server:
+            self.server.close()
+            try:
+                if os.stat(self.path).st_ino == self.inode:
+                    os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+class HistoryServer:
+    """Answer read-only TalkerHistory queries on a local unix socket, one JSON reply per connection."""
+
+    def __init__(self, history, socket_path, socket_mode=0o660, socket_group=None):
+        self.history = history
+        self.server = SocketServer(socket_path, self.handle, "HistoryServer", mode=socket_mode, group=socket_group)
+
+    def handle(self, conn):
+        # optional query in first line, e.g. "recent", default is everything
+        request = b""
+        try:
+            while b"\n" not in request and len(request) < 256:
+                data = conn.recv(256)
+                if not data:
+                    break
+                request += data
+        except socket.timeout:
+            pass
+        what = request.decode('ascii', errors='replace').strip() or "all"
+        conn.sendall(json.dumps(self.history.query(what), ensure_ascii=False).encode('utf-8') + b"\n")
+
+    def stop(self):
+        self.server.stop()
+
+class Metrics:
+    """Thread-safe counters and histograms, rendered in Prometheus text format."""
+
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.help = {}
+
+    def describe(self, name, text, label_names=()):
+        self.help[name] = (text, label_names)
+
+    def inc(self, name, labels=(), value=1):
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name, value, labels=()):
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            hist = series.get(labels)
+            if hist is None:
+                # per bucket counts, sum, count
+                hist = series[labels] = [[0] * len(self.BUCKETS), 0.0, 0]
+            for i, bound in enumerate(self.BUCKETS):
+                if value <= bound:
+                    hist[0][i] += 1
+                    break
+            hist[1] += value
+            hist[2] += 1
+
+    @staticmethod
+    def __labels(names, values, extra=""):
+        pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self):
+        out = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                text, label_names = self.help.get(name, ("", ()))
+                out.append(f"# HELP {name} {text}")
+                out.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    out.append(f"{name}{self.__labels(label_names, labels)} {value}")
+            for name, series in sorted(self.histograms.items()):
+                text, label_names = self.help.get(name, ("", ()))
+                out.append(f"# HELP {name} {text}")
+                out.append(f"# TYPE {name} histogram")
+                for labels, (buckets, total, count) in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip(self.BUCKETS, buckets):
+                        cumulative += n
+                        le = self.__labels(label_names, labels, f'le="{bound}"')
+                        out.append(f"{name}_bucket{le} {cumulative}")
+                    le = self.__labels(label_names, labels, 'le="+Inf"')
+                    out.append(f"{name}_bucket{le} {count}")
+                    out.append(f"{name}_sum{self.__labels(label_names, labels)} {total}")
+                    out.append(f"{name}_count{self.__labels(label_names, labels)} {count}")
+        return "\n".join(out) + "\n"
+
+metrics = Metrics()
+for name, text, label_names in (
+        ('oled_log_lines_total', "svxlink log lines parsed by line type.", ('type',)),
+        ('oled_parse_seconds', "Time spent parsing one batch of log data.", ()),
+        ('oled_render_seconds', "Time spent rendering one frame section.", ('section',)),
+        ('oled_i2c_flush_seconds', "Time spent sending one frame to the display.", ()),
+        ('oled_i2c_bytes_total', "Bytes sent to the display (with I2C control bytes).", ()),
+        ('oled_i2c_bus_bytes_total', "Bytes transferred on the I2C bus (with address and control bytes).", ()),
+        ('oled_i2c_transfers_total', "I2C transfers (i2c_rdwr ioctl calls) to the display.", ()),
+        ('oled_i2c_transfer_seconds', "Duration of one I2C transfer to the display.", ()),
+        ('oled_frames_total', "Frames sent to the display.", ()),
+        ('oled_text_cache_lookups_total', "Rendered text bitmap cache lookups by result.", ('result',)),
+        ('oled_sensor_read_seconds', "Sensor read latency.", ('sensor',)),
+        ('oled_log_to_display_seconds', "Time from talker log line timestamp to the frame showing it.", ()),
+        ('oled_profile_samples_total', "Sampling profiler hits of threads using CPU, by short stack (outermost first).", ('stack',)),
+        ):
+    metrics.describe(name, text, label_names)
+
+class MetricsExporter:
+    """Export metrics as Prometheus textfile and/or on a local unix socket."""
+
+    def __init__(self, textfile=None, socket_path=None, interval=15, socket_mode=0o660, socket_group=None):
+        self.textfile = textfile
+        self.socket_path = socket_path
+        self.interval = interval
+        self.server = SocketServer(socket_path, self.send, "MetricsExporter",
+                                   interval=interval if textfile else None, on_interval=self.write_textfile,
+                                   mode=socket_mode, group=socket_group)
+
+    def send(self, conn):
+        conn.sendall(metrics.render().encode('utf-8'))
+
+    def write_textfile(self):
+        tmp_file = self.textfile + ".tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write(metrics.render())
+            os.replace(tmp_file, self.textfile)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics to {self.textfile}: {e}")
+
+    def stop(self):
+        self.server.stop()
+        if self.textfile:
+            self.write_textfile()
+
+class SamplingProfiler:
+    """Opt-in sampling profiler, counts short stacks of other threads every `interval` seconds.
+
+    Threads are counted only if their CPU time grew since the last sample,
+    threads blocked in wait() or select() don't show up.
+    """
+
+    def __init__(self, interval=0.01, depth=3):
+        self.interval = interval
+        self.depth = depth
+        self.cpu_times = {}
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="SamplingProfiler", daemon=True)
+        self.thread.start()
+
+    def stack(self, frame):
+        names = []
+        while frame is not None and len(names) < self.depth:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            cpu_times = {}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                try:
+                    cpu_times[thread_id] = time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+                except OSError:
+                    # thread has just exited
+                    continue
+                if cpu_times[thread_id] > self.cpu_times.get(thread_id, cpu_times[thread_id]):
+                    metrics.inc('oled_profile_samples_total', (self.stack(frame),))
+            self.cpu_times = cpu_times
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+async def watch_readable(fd, callback):
+    """Call `callback` from the event loop whenever `fd` is readable, until cancelled."""
+    loop = asyncio.get_running_loop()
+    loop.add_reader(fd, callback)
+    try:
+        await loop.create_future()
+    finally:
+        loop.remove_reader(fd)
+
+class LogTailer:
+    """Wake SvxLogMonitor on changes of the svxlink log file only.
+
+    inotify watches the log file itself for writes and its directory for
+    creation / rename of the log file name (logrotate). Without inotify
+    the file is polled every `poll_interval` seconds.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ONLYDIR = 0x01000000
+    IN_CLOEXEC = 0o2000000
+    IN_NONBLOCK = 0o4000
+
+    def __init__(self, monitor, poll_interval=1, threaded=True):
+        self.monitor = monitor
+        self.logdir, self.logname = os.path.split(os.path.abspath(monitor.logfile))
+        self.poll_interval = poll_interval
+        self.stop_r, self.stop_w = os.pipe()
+
+        self.fd = None
+        try:
+            self.libc = ctypes.CDLL(None, use_errno=True)
+            fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            self.fd = fd
+            self.dir_wd = self.add_watch(self.logdir, self.IN_CREATE | self.IN_MOVED_TO | self.IN_ONLYDIR)
+            self.file_wd = self.add_watch(monitor.logfile, self.IN_MODIFY)
+        except (AttributeError, OSError) as e:
+            logger.debug(f"LogTailer: inotify not available, polling every {poll_interval} s: {e}")
+            if self.fd is not None:
+                os.close(self.fd)
+            self.fd = None
+
+        self.thread = None
+        if threaded:
+            self.thread = threading.Thread(target=self.run, name="LogTailer", daemon=True)
+            self.thread.start()
+
+    def add_watch(self, path, mask):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch {path} failed")
+        return wd
+
+    def read_events(self):
+        """Return (modified, rotated) flags for all pending inotify events."""
+        modified = False
+        rotated = False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return modified, rotated
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = struct.unpack_from('iIII', data, offset)
+            name = data[offset + 16:offset + 16 + length].rstrip(b'\0')
+            offset += 16 + length
+            if mask & self.IN_Q_OVERFLOW:
+                modified = True
+            elif wd == self.file_wd and mask & self.IN_MODIFY:
+                modified = True
+            elif wd == self.dir_wd and os.fsdecode(name) == self.logname:
+                rotated = True
+        return modified, rotated
+
+    def rotated(self):
+        logger.debug("LogTailer: svxlink log file replaced")
+        # read rest of the old file first
+        self.monitor.process()
+        try:
+            self.monitor.reopen()
+        except OSError as e:
+            logger.debug(f"LogTailer: reopen failed: {e}")
+            return
+        if self.fd is not None:
+            self.libc.inotify_rm_watch(self.fd, self.file_wd)
+            try:
+                self.file_wd = self.add_watch(self.monitor.logfile, self.IN_MODIFY)
+            except OSError as e:
+                logger.debug(f"LogTailer: {e}")
+        self.monitor.process()
+
+    def handle(self):
+        if self.fd is not None:
+            modified, rotated = self.read_events()
+        else:
+            modified = True
+            try:
+                rotated = os.stat(self.monitor.logfile).st_ino != os.fstat(self.monitor.fh.fileno()).st_ino
+            except OSError:
+                rotated = False
+        if rotated:
+            self.rotated()
+        elif modified:
             self.monitor.process()
 
-        def on_created(self, event):
-            if event.src_path != self.monitor.logfile:
+    def run(self):
+        fds = [self.stop_r]
+        timeout = self.poll_interval
+        if self.fd is not None:
+            fds.append(self.fd)
+            timeout = None
+        while True:
+            ready = select.select(fds, [], [], timeout)[0]
+            if self.stop_r in ready:
                 return
+            self.handle()
 
-            logger.debug(f"EventHandler: on created event: {event}")
-            self.monitor.reopen()
+    async def run_async(self):
+        if self.fd is not None:
+            await watch_readable(self.fd, self.handle)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            self.handle()
 
-        def on_moved(self, event):
-            if event.dest_path != self.monitor.logfile:
+    def stop(self):
+        if self.stop_w is None:
+            return
+        os.write(self.stop_w, b'x')
+        if self.thread:
+            self.thread.join()
+        os.close(self.stop_r)
+        os.close(self.stop_w)
+        self.stop_w = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+class LineStream:
+    """Feed SvxLogMonitor from a named pipe or stdin ("-"), lines go to the parser without a file round trip.
+
+    Each wake up reads at most `read_size` bytes, a writer faster than the
+    parser is held back by the full pipe instead of growing memory here.
+    """
+
+    def __init__(self, monitor, path, read_size=64*1024, threaded=True):
+        self.monitor = monitor
+        self.path = path
+        self.read_size = read_size
+        self.stop_r, self.stop_w = os.pipe()
+        self.keep_w = None
+        self.eof = False
+        self.loop = None
+        self.fd = self.open()
+        os.set_blocking(self.fd, False)
+        self.thread = None
+        if threaded:
+            self.thread = threading.Thread(target=self.run, name=type(self).__name__, daemon=True)
+            self.thread.start()
+
+    def open(self):
+        import stat
+        if self.path == '-':
+            return os.dup(sys.stdin.fileno())
+        fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        if stat.S_ISFIFO(os.fstat(fd).st_mode):
+            # own writer end keeps the pipe open while svxlink restarts, no EOF then
+            self.keep_w = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+        return fd
+
+    def handle(self):
+        try:
+            data = os.read(self.fd, self.read_size)
+        except BlockingIOError:
+            return
+        if not data:
+            self.end_of_input()
+            return
+        start = time.perf_counter()
+        counts = {}
+        self.consume(data, counts)
+        self.monitor.record(counts, start)
+
+    def end_of_input(self):
+        logger.debug(f"{type(self).__name__}: end of input")
+        self.eof = True
+        if self.loop:
+            self.loop.remove_reader(self.fd)
+
+    def consume(self, data, counts):
+        self.monitor.feed(data, counts, when=datetime.now())
+
+    def run(self):
+        while not self.eof:
+            ready = select.select([self.stop_r, self.fd], [], [])[0]
+            if self.stop_r in ready:
                 return
+            self.handle()
 
-            logger.debug(f"EventHandler: on moved event: {event}")
-            self.monitor.reopen()
+    async def run_async(self):
+        self.loop = asyncio.get_running_loop()
+        await watch_readable(self.fd, self.handle)
 
-    def __init__(self, screen, logfile="/var/log/svxlink"):
+    def close(self):
+        os.close(self.fd)
+        if self.keep_w is not None:
+            os.close(self.keep_w)
+
+    def stop(self):
+        if self.stop_w is None:
+            return
+        os.write(self.stop_w, b'x')
+        if self.thread:
+            self.thread.join()
+        os.close(self.stop_r)
+        os.close(self.stop_w)
+        self.stop_w = None
+        self.close()
+
+class JournalReader(LineStream):
+    """Feed SvxLogMonitor from the systemd journal of svxlink unit, no log file is needed.
+
+    Entries come from `journalctl --follow --output=json` (or `command`, e.g.
+    cat of a FIFO in tests). The cursor of the last parsed entry is kept in
+    the monitor checkpoint, restart continues right after it, without it the
+    last `initial_lines` entries are replayed. journalctl exiting is logged
+    and it is started again after `restart_delay` seconds, a cursor it
+    rejects is dropped.
+    """
+
+    def __init__(self, monitor, unit="svxlink", cursor=None, command=None, initial_lines=1000,
+                 read_size=64*1024, threaded=True, restart_delay=5):
+        self.unit = unit
+        self.cursor = cursor
+        self.command = command
+        self.initial_lines = initial_lines
+        self.restart_delay = restart_delay
+        self.process = None
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.buffer = ""
+        super().__init__(monitor, None, read_size=read_size, threaded=threaded)
+
+    def journal_command(self):
+        if self.command:
+            return self.command
+        command = ['journalctl', '--follow', '--output=json', '--unit', self.unit]
+        return command + (['--after-cursor', self.cursor] if self.cursor else ['--lines', str(self.initial_lines)])
+
+    def open(self):
+        import subprocess
+        command = self.journal_command()
+        logger.debug(f"JournalReader: running {' '.join(command)}")
+        self.process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE)
+        return self.process.stdout.fileno()
+
+    def end_of_input(self):
+        if self.loop:
+            self.loop.remove_reader(self.fd)
+        self.close()
+        status = self.process.returncode
+        logger.warning(f"JournalReader: journalctl exited with status {status}, restarting in {self.restart_delay} s")
+        if status and not self.command and self.cursor and self.monitor.cursor == self.cursor:
+            # nothing was read after the saved cursor, e.g. "Failed to seek to cursor"
+            logger.warning(f"JournalReader: journal cursor rejected, reading last {self.initial_lines} entries")
+            self.monitor.cursor = None
+        self.cursor = self.monitor.cursor
+        if self.loop:
+            self.loop.call_later(self.restart_delay, self.restart)
+        elif select.select([self.stop_r], [], [], self.restart_delay)[0]:
+            self.eof = True
+        else:
+            self.restart()
+
+    def restart(self):
+        self.decoder.reset()
+        self.buffer = ""
+        self.fd = self.open()
+        os.set_blocking(self.fd, False)
+        if self.loop:
+            self.loop.add_reader(self.fd, self.handle)
+
+    def consume(self, data, counts):
+        lines = (self.buffer + self.decoder.decode(data)).split('\n')
+        self.buffer = lines.pop()
+        if len(self.buffer) > 16 * self.monitor.max_line:
+            self.buffer = ""
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            message = entry.get('MESSAGE')
+            if isinstance(message, list):
+                # message which is not valid UTF-8 is exported as list of bytes
+                message = bytes(message).decode('utf-8', errors='replace')
+            if isinstance(message, str):
+                when = datetime.fromtimestamp(int(entry.get('__REALTIME_TIMESTAMP', 0)) / 1000000)
+                self.monitor.parse(message.splitlines(), counts, when)
+            self.monitor.cursor = entry.get('__CURSOR', self.monitor.cursor)
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+        self.process.stdout.close()
+
+class SvxLogMonitor:
+    """Parse svxlink log lines into display state changes.
+
+    Lines come from one of the sources: "file" (tail of the svxlink log
+    file, default), "journal" (systemd journal of `journal_unit`) or
+    "stream" (named pipe or "-" for stdin at `logfile`).
+    """
+
+    def __init__(self, screen, logfile="/var/log/svxlink", watch=True, read_size=64*1024,
+                 state_file=None, max_scan=1024*1024, scan_chunk=16*1024, threaded=True, history=None,
+                 source="file", journal_unit="svxlink", journal_command=None, max_line=4096):
         self.screen = screen
+        self.history = history
         self.logfile = logfile
-        self.re_talker =  re.compile(r'^(?P<date>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:\.(?P<msecs>\d{3}))?: ReflectorLogic: Talker (?P<state>(start|stop)) on TG #(?P<tgnum>\d+): (?P<caller>.*)')
-        self.re_tg_current =  re.compile(r'^(?P<date>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:\.(?P<msecs>\d{3}))?: ReflectorLogic: Selecting TG #(?P<tgnum>\d+)')
-        self.re_start = re.compile(r'^(?P<date>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:\.(?P<msecs>\d{3}))?: Starting logic:')
-        self.re_disconnected = re.compile(r'^(?P<date>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:\.(?P<msecs>\d{3}))?: ReflectorLogic: Disconnected from')
-        self.re_connected = re.compile(r'^(?P<date>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:\.(?P<msecs>\d{3}))?: ReflectorLogic: Connection established')
-        self.re_shutdown = re.compile(r'^(?P<date>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:\.(?P<msecs>\d{3}))?: .* Shutting down application')
-        self.re_node_activity = re.compile(r'^(?P<date>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:\.(?P<msecs>\d{3}))?: ReflectorLogic: Node (joined|left)')
-
+        self.source = source
+        self.read_size = read_size
+        # partial line longer than this is dropped, memory stays bounded on garbage input
+        self.max_line = max_line
+        self.state_file = state_file
+        self.max_scan = max_scan
+        self.scan_chunk = scan_chunk
+        # common "date[.msecs]: " line header, message tail is dispatched
+        # on first word after "ReflectorLogic: "
+        self.re_header = re.compile(r'(?P<date>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:\.(?P<msecs>\d{3}))?: ')
+        self.re_talker = re.compile(r'Talker (?P<state>(start|stop)) on TG #(?P<tgnum>\d+): (?P<caller>.*)')
+        self.re_tg_current = re.compile(r'Selecting TG #(?P<tgnum>\d+)')
+        self.reflector_handlers = {
+            'Talker': self.__handle_talker,
+            'Selecting': self.__handle_tg_current,
+            'Node': self.__handle_node_activity,
+            'Connection': self.__handle_connected,
+            'Disconnected': self.__handle_disconnected,
+        }
+        self.day = None
+        # journal position of the last parsed entry
+        self.cursor = None
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
         self.buffer = ""
+        self.fh = None
 
-        self.open(notifier=False)
-        self.initial_process()
+        if source == "file":
+            self.open(notifier=False)
+            self.initial_process()
+        elif source == "journal":
+            self.resume_cursor()
 
-        self.event_handler = self.EventHandler(self)
-        self.observer = Observer()
-        self.observer.schedule(self.event_handler, "/var/log", recursive=False)
-        self.observer.start()
+        self.tailer = None
+        if not watch:
+            # caller feeds the log by calling process() (benchmark)
+            return
 
-    def initial_process(self):
-        # speed up by processing only last 5kB
-        size_back = 5*1024
+        if source == "file":
+            self.tailer = LogTailer(self, threaded=threaded)
+        elif source == "journal":
+            self.tailer = JournalReader(self, unit=journal_unit, cursor=self.cursor,
+                                        command=journal_command, threaded=threaded)
+        else:
+            self.tailer = LineStream(self, logfile, threaded=threaded)
+
+    # what each kind of line tells about the state at startup, substring
+    # tests only, lines are parsed properly on the forward pass
+    SCAN_KINDS = (
+        (b'ReflectorLogic: Connection established', {'tg', 'talker', 'connection'}),
+        (b'ReflectorLogic: Disconnected from', {'tg', 'talker', 'connection'}),
+        (b'Shutting down application', {'tg', 'talker', 'connection'}),
+        (b'Starting logic:', {'tg', 'talker'}),
+        (b'ReflectorLogic: Selecting TG #', {'tg'}),
+        (b'ReflectorLogic: Node ', {'connection'}),
+        (b'ReflectorLogic: Talker ', {'talker'}),
+    )
+    SCAN_TG = re.compile(rb'(?:Selecting|Talker (?:start|stop) on) TG #(\d+)')
+
+    def find_start_offset(self):
+        """Scan log backwards until lines defining current TG, connection and talker are found.
 
+        Talker is found only with a talker line on the current TG, lines on
+        monitored TGs don't count. Returns offset of the oldest line needed,
+        at most max_scan bytes from the end.
+        """
         self.fh.seek(0, 2)
-        file_size = self.fh.tell()
-        if file_size > size_back:
-            self.fh.seek(file_size-size_back)
-        else:
-            self.fh.seek(0)
+        end = self.fh.tell()
+        needed = {'tg', 'talker', 'connection'}
+        tg = None
+        talker_tgs = set()
+        pos = end
+        carry = b''
+        # incomplete last line isn't parsed by the forward pass yet
+        skip_last = True
+        while pos > 0 and end - pos < self.max_scan:
+            size = min(self.scan_chunk, pos)
+            pos -= size
+            self.fh.seek(pos)
+            parts = (self.fh.read(size) + carry).split(b'\n')
+            if skip_last:
+                parts.pop()
+                skip_last = not parts
+                if skip_last:
+                    carry = b''
+                    continue
+            # first part continues in the previous chunk, unless at file start
+            carry = parts[0] if pos > 0 else b''
+            offset = pos + len(parts[0]) + 1 if pos > 0 else pos
+            first = 1 if pos > 0 else 0
+            line_offsets = []
+            for part in parts[first:]:
+                line_offsets.append((offset, part))
+                offset += len(part) + 1
+            for offset, line in reversed(line_offsets):
+                for pattern, kinds in self.SCAN_KINDS:
+                    if pattern not in line:
+                        continue
+                    if kinds in ({'tg'}, {'talker'}):
+                        m = self.SCAN_TG.search(line)
+                        if not m:
+                            break
+                        if kinds == {'talker'}:
+                            talker_tgs.add(int(m.group(1)))
+                            break
+                        if 'tg' in needed:
+                            tg = int(m.group(1))
+                    needed -= kinds
+                    break
+                if 'talker' in needed and 'tg' not in needed and tg in talker_tgs:
+                    needed.discard('talker')
+                if not needed:
+                    return offset
+        return pos + len(carry) + 1 if pos > 0 else 0
+
+    def initial_process(self):
+        if self.resume_checkpoint():
+            return
+
+        offset = self.find_start_offset()
+        logger.debug(f"SvxLogMonitor: initial processing from offset {offset}")
+        self.fh.seek(offset)
+        self.decoder.reset()
+        self.buffer = ""
 
         # process to find out current tg group
         self.process()
-        last_tg_current_call = None
-        for call in self.screen.calls:
-            if call.tgnum == self.screen.current_tg:
-                last_tg_current_call = call
-        # leave only last entry for a group
-        if last_tg_current_call:
-            self.screen.calls = [ last_tg_current_call ]
+        self.apply_initial_calls()
+
+    def apply_initial_calls(self):
+        self.screen.apply_initial_calls()
+
+    def save_checkpoint(self):
+        """Persist log position and display state, so restart doesn't need to scan the log."""
+        if not self.state_file:
+            return
+        if self.source == "file":
+            # offset of the first byte not yet parsed into lines
+            pending = self.decoder.getstate()[0]
+            offset = self.fh.tell() - len(pending) - len(self.buffer.encode('utf-8'))
+            checkpoint = {
+                'inode': os.fstat(self.fh.fileno()).st_ino,
+                'offset': offset,
+                'screen': self.screen.get_state(),
+            }
+        elif self.source == "journal" and self.cursor:
+            checkpoint = {
+                'cursor': self.cursor,
+                'screen': self.screen.get_state(),
+            }
+        else:
+            # stream can't be replayed, state from before restart may be stale
+            return
+        try:
+            tmp_file = self.state_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(checkpoint, f)
+            os.replace(tmp_file, self.state_file)
+            logger.debug(f"SvxLogMonitor: saved checkpoint {checkpoint}")
+        except OSError as e:
+            logger.warning(f"Failed to save state to {self.state_file}: {e}")
+
+    def resume_checkpoint(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return False
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            stat = os.fstat(self.fh.fileno())
+            offset = checkpoint['offset']
+            if checkpoint['inode'] != stat.st_ino or offset > stat.st_size:
+                logger.debug("SvxLogMonitor: checkpoint is for other log file, ignoring")
+                return False
+            if stat.st_size - offset > self.max_scan:
+                logger.debug("SvxLogMonitor: checkpoint too old, ignoring")
+                return False
+            self.screen.restore_state(checkpoint['screen'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug(f"SvxLogMonitor: invalid checkpoint {self.state_file}: {e}")
+            return False
+
+        logger.debug(f"SvxLogMonitor: resuming from checkpoint offset {offset}")
+        self.fh.seek(offset)
+        self.decoder.reset()
+        self.buffer = ""
+        self.process()
+        self.apply_initial_calls()
+        return True
+
+    def resume_cursor(self):
+        """Restore display state and journal cursor, entries after it are replayed by JournalReader."""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            cursor = checkpoint['cursor']
+            self.screen.restore_state(checkpoint['screen'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug(f"SvxLogMonitor: no journal cursor in {self.state_file}: {e}")
+            return
+        logger.debug(f"SvxLogMonitor: resuming journal after cursor {cursor}")
+        self.cursor = cursor
 
     def open(self, notifier=True):
-        self.fh = open(self.logfile, 'r', encoding='utf-8')
+        # binary mode, so tell() is a byte offset comparable with file size
+        self.fh = open(self.logfile, 'rb')
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.buffer = ""
 
     def close(self):
-        self.fh.close()
+        if self.fh:
+            self.fh.close()
 
     def reopen(self):
         logger.debug("SvxLogMonitor: reopening svxlink log file")
@@ -134,108 +941,1402 @@ class SvxLogMonitor:
         self.open()
 
     def stop_monitoring(self):
-        self.observer.stop()
-        self.observer.join()
+        if not self.tailer:
+            return
+        self.tailer.stop()
+
+    def parse_time(self, date, msecs):
+        # date part is the same for most lines, parse it only when it changes
+        if self.day is None or self.day[0] != date[:10]:
+            self.day = (date[:10], int(date[0:4]), int(date[5:7]), int(date[8:10]))
+        _, year, month, day = self.day
+        return datetime(year, month, day, int(date[11:13]), int(date[14:16]), int(date[17:19]),
+                        int(msecs) * 1000 if msecs else 0)
+
+    def __handle_talker(self, date, msecs, msg, line):
+        m = self.re_talker.match(msg)
+        if not m:
+            return None
+        logger.debug(f"SvxLogMonitor process: matched talker line {line}")
+        state = m.group('state')
+        tgnum = int(m.group('tgnum'))
+        tgname = self.screen.get_tgname(tgnum)
+        caller = m.group('caller')
+        entrytime = self.parse_time(date, msecs)
+
+        call = Call(tgnum=tgnum, tgname=tgname, state=state, entrytime=entrytime, caller=caller)
+        if self.history:
+            self.history.add(call)
+        self.screen.post('call', call)
+        return 'talker'
+
+    def __handle_tg_current(self, date, msecs, msg, line):
+        m = self.re_tg_current.match(msg)
+        if not m:
+            return None
+        logger.debug(f"SvxLogMonitor process: matched current tg group line {line}")
+        self.screen.post('tg', int(m.group('tgnum')))
+        return 'tg'
+
+    def __handle_node_activity(self, date, msecs, msg, line):
+        if not msg.startswith(('Node joined', 'Node left')):
+            return None
+        logger.debug(f"SvxLogMonitor process: matched node activity line {line}")
+        # for node activity we don't zeroe calls
+        self.screen.post('node')
+        return 'node'
+
+    def __handle_connected(self, date, msecs, msg, line):
+        if not msg.startswith('Connection established'):
+            return None
+        logger.debug(f"SvxLogMonitor process: matched connected line {line}")
+        self.screen.post('connected')
+        return 'connected'
+
+    def __handle_disconnected(self, date, msecs, msg, line):
+        if not msg.startswith('Disconnected from'):
+            return None
+        logger.debug(f"SvxLogMonitor process: matched disconnected line {line}")
+        self.screen.post('disconnected')
+        return 'disconnected'
+
+    def process_line(self, line, when=None):
+        # cheap substring tests reject most lines before any regex is run
+        if 'ReflectorLogic: ' not in line and 'Starting logic:' not in line \
+                and 'Shutting down application' not in line:
+            return None
+
+        m = self.re_header.match(line)
+        if not m:
+            if when is None:
+                return None
+            # svxlink output without its own timestamps (journal, stdout pipe)
+            line = f"{when:%Y-%m-%d %H:%M:%S}.{when.microsecond // 1000:03d}: {line}"
+            m = self.re_header.match(line)
+        msg = line[m.end():]
+
+        if msg.startswith('ReflectorLogic: '):
+            msg = msg[16:]
+            handler = self.reflector_handlers.get(msg.split(' ', 1)[0])
+            if handler:
+                event = handler(m.group('date'), m.group('msecs'), msg, line)
+                if event:
+                    return event
+
+        if ' Shutting down application' in msg:
+            logger.debug(f"SvxLogMonitor process: matched shutdown line {line}")
+            self.screen.post('disconnected')
+            return 'shutdown'
+
+        if msg.startswith('Starting logic:'):
+            logger.debug(f"SvxLogMonitor process: matched start line {line}")
+            # initialize to default state
+            self.screen.post('start')
+            return 'start'
+
+        return None
 
     def process(self):
         logger.debug(f"SvxLogMonitor process called")
-        self.buffer += self.fh.read()
-        while '\n' in self.buffer:
-            line, self.buffer = self.buffer.split('\n', 1)
-
-            m = self.re_talker.match(line)
-            if m:
-                logger.debug(f"SvxLogMonitor process: matched talker line {line}")
-                date = m.group('date')
-                msecs = m.group('msecs')
-                # handle format with and without microseconds
-                if msecs is None:
-                    date += ".000"
+        if os.fstat(self.fh.fileno()).st_size < self.fh.tell():
+            # copytruncate style rotation, continue from the beginning
+            logger.debug("SvxLogMonitor: svxlink log file truncated")
+            self.fh.seek(0)
+            self.decoder.reset()
+            self.buffer = ""
+
+        start = time.perf_counter()
+        counts = {}
+        while True:
+            data = self.fh.read(self.read_size)
+            if not data:
+                break
+            self.feed(data, counts)
+        self.record(counts, start)
+
+    def feed(self, data, counts, when=None):
+        """Parse read bytes, incomplete last line is kept for the next call."""
+        # split whole read at once, last element is incomplete line (or empty)
+        lines = (self.buffer + self.decoder.decode(data)).split('\n')
+        self.buffer = lines.pop()
+        if len(self.buffer) > self.max_line:
+            logger.debug(f"SvxLogMonitor: dropping {len(self.buffer)} characters without newline")
+            self.buffer = ""
+        self.parse(lines, counts, when)
+
+    def parse(self, lines, counts, when=None):
+        for line in lines:
+            kind = self.process_line(line, when) or 'other'
+            counts[kind] = counts.get(kind, 0) + 1
+
+    def record(self, counts, start):
+        for kind, count in counts.items():
+            metrics.inc('oled_log_lines_total', (kind,), count)
+        metrics.observe('oled_parse_seconds', time.perf_counter() - start)
+
+def read_cpu_load():
+    import psutil
+    load1, load5, load15 = psutil.getloadavg()
+    cpu_usage = (load1/os.cpu_count()) * 100
+    return f'{str(int(float(cpu_usage))):>{2}}'
+
+def read_cpu_temp():
+    with open("/sys/class/thermal/thermal_zone0/temp", "r", encoding='utf-8') as temp:
+        return str(int(temp.read()[:2]))
+
+def read_w1_temp(sensor_file):
+    # DS18B20 conversion blocks the read for ~750 ms
+    with open(sensor_file, 'r', encoding='utf-8') as f:
+        fc = f.read()
+    m = re.search(r't=(?P<temp>-?\d+)', fc)
+    if not m:
+        return None
+    return str(int(float(m.group('temp')) / 1000.0))
+
+class SensorSampler:
+    """Read one sensor on its own thread every `interval` seconds and cache the value."""
+
+    def __init__(self, name, read, interval, on_change=None, threaded=True):
+        self.name = name
+        self.read = read
+        self.interval = interval
+        self.on_change = on_change
+        # value is stale if not refreshed for few intervals (e.g. hanging 1-Wire bus)
+        self.ttl = interval * 3
+        self.value = None
+        self.timestamp = 0
+        self.stopping = False
+        self.suspended = False
+        # set on stop() and resume(), async runtime uses its own event
+        self.wake = threading.Event()
+        self.loop = None
+        self.async_wake = None
+        if threaded:
+            self.thread = threading.Thread(target=self.run, name=f"SensorSampler-{name}", daemon=True)
+            self.thread.start()
+
+    def sample(self):
+        start = time.perf_counter()
+        try:
+            value = self.read()
+        except Exception as e:
+            logger.debug(f"SensorSampler {self.name}: read failed: {e}")
+            value = None
+        metrics.observe('oled_sensor_read_seconds', time.perf_counter() - start, (self.name,))
+        # fresh value after suspend clears the stale mark even if unchanged
+        changed = value != self.value or self.get()[1]
+        self.value = value
+        self.timestamp = time.monotonic()
+        if changed and self.on_change:
+            self.on_change(self.name)
+
+    def run(self):
+        while not self.stopping:
+            if not self.suspended:
+                self.sample()
+            self.wake.wait(None if self.suspended else self.interval)
+            self.wake.clear()
+
+    async def run_async(self):
+        loop = asyncio.get_running_loop()
+        self.loop = loop
+        self.async_wake = asyncio.Event()
+        while not self.stopping:
+            if not self.suspended:
+                # sysfs and 1-Wire reads block, keep them off the event loop
+                await loop.run_in_executor(None, self.sample)
+            try:
+                await asyncio.wait_for(self.async_wake.wait(), None if self.suspended else self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.async_wake.clear()
+
+    def set_interval(self, interval):
+        """Change sampling interval, applied after the current wait."""
+        self.interval = interval
+        self.ttl = interval * 3
+
+    def get(self):
+        """Return cached (value, stale) pair, never blocks."""
+        stale = time.monotonic() - self.timestamp > self.ttl
+        return self.value, stale
+
+    def suspend(self):
+        self.suspended = True
+
+    def resume(self):
+        """Continue sampling, first sample is taken right away."""
+        self.suspended = False
+        self.wake.set()
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.async_wake.set)
+
+    def stop(self):
+        self.stopping = True
+        self.wake.set()
+        # sensor removed on config reload, its task ends with the next wake up
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.async_wake.set)
+
+class AddressCache:
+    """Keep sorted list of IP addresses, refreshed on rtnetlink address change events.
+
+    Without netlink (e.g. restricted container) addresses are polled every
+    `poll_interval` seconds instead.
+    """
+
+    RTMGRP_LINK = 0x1
+    RTMGRP_IPV4_IFADDR = 0x10
+    RTMGRP_IPV6_IFADDR = 0x100
+
+    def __init__(self, on_change=None, poll_interval=60, threaded=True):
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.ips = None
+        self.stopping = False
+        self.suspended = False
+        self.loop = None
+        # written on stop() and resume()
+        self.wake_r, self.wake_w = os.pipe()
+        self.sock = None
+        try:
+            self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            self.sock.bind((0, self.RTMGRP_LINK | self.RTMGRP_IPV4_IFADDR | self.RTMGRP_IPV6_IFADDR))
+            self.sock.setblocking(False)
+        except (AttributeError, OSError) as e:
+            logger.debug(f"AddressCache: netlink not available, polling every {poll_interval} s: {e}")
+            if self.sock:
+                self.sock.close()
+            self.sock = None
+        self.thread = None
+        if threaded:
+            self.thread = threading.Thread(target=self.run, name="AddressCache", daemon=True)
+            self.thread.start()
+
+    @staticmethod
+    def find_ips():
+        import psutil
+        ips4 = []
+        ips6 = []
+        for nic, addrs in psutil.net_if_addrs().items():
+            if nic == "lo":
+                continue
+            for addr in addrs:
+                if addr.family not in [ socket.AF_INET, socket.AF_INET6 ]:
+                    continue
+                # skip IPv6 link local addresses
+                if '%' in addr.address:
+                    continue
+                if addr.family == socket.AF_INET:
+                    ips4.append(addr.address)
                 else:
-                    date += ".%03d" % int(msecs)
-                state = m.group('state')
-                tgnum = int(m.group('tgnum'))
-                tgname = self.screen.get_tgname(tgnum)
-                caller = m.group('caller')
+                    ips6.append(addr.address)
+        # prefer ipv4 and show ipv6 only if no ipv4 are available
+        ips = ips4 if ips4 else ips6
+        ips.sort()
+        return ips
+
+    def refresh(self):
+        ips = self.find_ips()
+        if ips == self.ips:
+            return
+        logger.debug(f"AddressCache: addresses changed: {ips}")
+        self.ips = ips
+        if self.on_change:
+            self.on_change(ips)
+
+    def run(self):
+        fds = [self.wake_r]
+        if self.sock:
+            fds.append(self.sock)
+        self.refresh()
+        while True:
+            timeout = None if self.sock or self.suspended else self.poll_interval
+            ready = select.select(fds, [], [], timeout)[0]
+            if self.wake_r in ready:
+                os.read(self.wake_r, 64)
+                if self.stopping:
+                    return
+            if self.sock in ready:
+                self.drain()
+            # addresses are enumerated again on resume
+            if not self.suspended:
+                self.refresh()
+
+    def drain(self):
+        # drain whole burst of messages, content is not needed
+        try:
+            while self.sock.recv(65536):
+                pass
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            # ENOBUFS on overflow, addresses are read again anyway
+            logger.debug(f"AddressCache: netlink recv failed: {e}")
+
+    async def run_async(self):
+        self.loop = asyncio.get_running_loop()
+        self.refresh()
+        if self.sock:
+            def __changed():
+                self.drain()
+                if not self.suspended:
+                    self.refresh()
+            await watch_readable(self.sock.fileno(), __changed)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self.suspended:
+                self.refresh()
+
+    def suspend(self):
+        self.suspended = True
+
+    def resume(self):
+        self.suspended = False
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.refresh)
+        else:
+            os.write(self.wake_w, b'r')
 
-                entrytime = datetime.strptime(date, '%Y-%m-%d %H:%M:%S.%f')
+    def stop(self):
+        if self.wake_w is None:
+            return
+        self.stopping = True
+        os.write(self.wake_w, b'x')
+        if self.thread:
+            self.thread.join()
+        os.close(self.wake_r)
+        os.close(self.wake_w)
+        self.wake_w = None
+        if self.sock:
+            self.sock.close()
+
+class TgNameIndex:
+    """TG number to display name index, rebuilt in background when tgdb.json changes.
+
+    Names are sanitized and truncated once per rebuild, lookups are plain dict hits.
+    """
+
+    def __init__(self, tgfile="/var/www/html/include/tgdb.json", on_change=None, check_interval=10,
+                 threaded=True):
+        self.tgfile = Path(tgfile)
+        self.on_change = on_change
+        self.check_interval = check_interval
+        self.names = {}
+        self.mtime = 0
+        self.stop_event = threading.Event()
+        if threaded:
+            self.thread = threading.Thread(target=self.run, name="TgNameIndex", daemon=True)
+            self.thread.start()
+
+    @staticmethod
+    def sanitize(name):
+        return re.sub(r'[^a-zA-Z0-9ążźśćęńłóĄŻŹŚĆĘŃŁÓ:,\-\s]',"",str(name))
+
+    def rebuild(self):
+        try:
+            tgmtime = self.tgfile.stat().st_mtime
+        except OSError:
+            return
+        if tgmtime <= self.mtime:
+            return
+        try:
+            with self.tgfile.open(encoding='utf-8') as f:
+                tg_names = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            # probably file is being written, try again on next check
+            logger.debug(f"TgNameIndex: failed to load {self.tgfile}: {e}")
+            return
+        if not isinstance(tg_names, dict):
+            logger.debug(f"TgNameIndex: {self.tgfile} is not a TG number to name mapping")
+            return
 
-                self.screen.calls.append(Call(tgnum=tgnum, tgname=tgname, state=state, entrytime=entrytime, caller=caller))
+        names = {}
+        for tg, name in tg_names.items():
+            try:
+                names[int(tg)] = self.sanitize(name)
+            except ValueError:
                 continue
+        # swap whole dict at once, readers never see partial index
+        self.names = names
+        self.mtime = tgmtime
+        logger.debug(f"TgNameIndex: loaded {len(names)} TG names")
+        if self.on_change:
+            self.on_change()
+
+    def run(self):
+        while True:
+            self.rebuild()
+            if self.stop_event.wait(self.check_interval):
+                return
 
-            m = self.re_tg_current.match(line)
-            if m:
-                logger.debug(f"SvxLogMonitor process: matched current tg group line {line}")
-                self.screen.current_tg = int(m.group('tgnum'))
-                continue
+    async def run_async(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await loop.run_in_executor(None, self.rebuild)
+            await asyncio.sleep(self.check_interval)
 
-            if self.re_node_activity.match(line):
-                logger.debug(f"SvxLogMonitor process: matched node activity line {line}")
-                # for node activity we don't zeroe calls
-                self.screen.reflector_connected(clean_calls=False)
+    def get(self, tg, default=None):
+        return self.names.get(tg, default)
+
+    def stop(self):
+        self.stop_event.set()
+
+class SvxlinkWatcher:
+    """Track svxlink process liveness without spawning processes.
+
+    The PID is looked up in /proc once and then watched with a pidfd
+    (or cheap /proc/<pid> checks on kernels without pidfd support).
+    /proc is scanned again only after the process exited.
+    """
+
+    def __init__(self, screen, name="svxlink", interval=5, threaded=True):
+        self.screen = screen
+        self.name = name
+        self.interval = interval
+        self.pid = None
+        self.alive = None
+        self.stop_r, self.stop_w = os.pipe()
+        self.thread = None
+        if threaded:
+            self.thread = threading.Thread(target=self.run, name="SvxlinkWatcher", daemon=True)
+            self.thread.start()
+
+    def find_pid(self):
+        own_pid = os.getpid()
+        for entry in os.scandir('/proc'):
+            if not entry.name.isdigit() or int(entry.name) == own_pid:
                 continue
+            if self.is_svxlink(int(entry.name)):
+                return int(entry.name)
+        return None
+
+    def is_svxlink(self, pid):
+        try:
+            with open(f"/proc/{pid}/comm", 'r', encoding='utf-8') as f:
+                return self.name in f.read()
+        except OSError:
+            return False
 
-            if self.re_connected.match(line):
-                logger.debug(f"SvxLogMonitor process: matched connected line {line}")
-                self.screen.reflector_connected()
+    def set_alive(self, alive):
+        if alive == self.alive:
+            return
+        logger.debug(f"SvxlinkWatcher: svxlink {'running, pid ' + str(self.pid) if alive else 'not running'}")
+        self.alive = alive
+        if not alive:
+            self.screen.post('disconnected')
+
+    def wait_for_exit(self):
+        """Block until svxlink exits (returns True) or watcher is stopped (returns False)."""
+        poller = select.poll()
+        poller.register(self.stop_r, select.POLLIN)
+        pidfd = None
+        try:
+            pidfd = os.pidfd_open(self.pid)
+            poller.register(pidfd, select.POLLIN)
+        except (AttributeError, OSError) as e:
+            logger.debug(f"SvxlinkWatcher: pidfd not available, using /proc checks: {e}")
+        try:
+            while True:
+                events = poller.poll(None if pidfd is not None else self.interval * 1000)
+                if any(fd == self.stop_r for fd, _ in events):
+                    return False
+                if pidfd is not None:
+                    if events:
+                        return True
+                elif not self.is_svxlink(self.pid):
+                    return True
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
+
+    def run(self):
+        while True:
+            self.pid = self.find_pid()
+            self.set_alive(self.pid is not None)
+            if self.pid is None:
+                # not running, look again later
+                if select.select([self.stop_r], [], [], self.interval)[0]:
+                    return
                 continue
+            if not self.wait_for_exit():
+                return
 
-            if self.re_disconnected.match(line) or self.re_shutdown.match(line):
-                logger.debug(f"SvxLogMonitor process: matched disconnected / shutdown line {line}")
-                self.screen.reflector_disconnected()
+    async def run_async(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self.pid = self.find_pid()
+            self.set_alive(self.pid is not None)
+            if self.pid is None:
+                await asyncio.sleep(self.interval)
+                continue
+            try:
+                pidfd = os.pidfd_open(self.pid)
+            except (AttributeError, OSError) as e:
+                logger.debug(f"SvxlinkWatcher: pidfd not available, using /proc checks: {e}")
+                while self.is_svxlink(self.pid):
+                    await asyncio.sleep(self.interval)
                 continue
+            exited = loop.create_future()
+            loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+            try:
+                await exited
+            finally:
+                loop.remove_reader(pidfd)
+                os.close(pidfd)
 
-            if self.re_start.match(line):
-                logger.debug(f"SvxLogMonitor process: matched start line {line}")
+    def stop(self):
+        if self.stop_w is None:
+            return
+        os.write(self.stop_w, b'x')
+        if self.thread:
+            self.thread.join()
+        os.close(self.stop_r)
+        os.close(self.stop_w)
+        self.stop_w = None
+
+class I2CTransport:
+    """luma serial interface on smbus2 i2c_rdwr, writes made inside batch() go out in one ioctl.
+
+    Each command group and data chunk is one I2C message, messages of a batch
+    are joined with repeated START. `chunk_size` limits message length
+    (control byte included) for adapters with small transfer buffers.
+    """
+
+    # I2C_RDWR_IOCTL_MAX_MSGS
+    MAX_MESSAGES = 42
+
+    def __init__(self, port=1, address=0x3C, chunk_size=4096, bus=None):
+        import smbus2
+        self.address = address
+        self.chunk_size = max(chunk_size, 2)
+        self.i2c_msg_write = smbus2.i2c_msg.write
+        self.managed = bus is None
+        self.bus = smbus2.SMBus(port) if bus is None else bus
+        self.pending = []
+        self.batching = 0
+        # totals for the benchmark, bytes include address byte, time spent
+        # in transfers is only in the oled_i2c_transfer_seconds histogram
+        self.bytes = 0
+        self.transfers = 0
+
+    def command(self, *cmd):
+        # command with its arguments must stay in one message
+        self.pending.append(self.i2c_msg_write(self.address, [0x00, *cmd]))
+        if not self.batching:
+            self.flush()
+
+    def data(self, data):
+        step = self.chunk_size - 1
+        for i in range(0, len(data), step):
+            self.pending.append(self.i2c_msg_write(self.address, [0x40, *data[i:i + step]]))
+        if not self.batching:
+            self.flush()
+
+    @contextmanager
+    def batch(self):
+        self.batching += 1
+        try:
+            yield
+        finally:
+            self.batching -= 1
+            if not self.batching:
+                self.flush()
+
+    def flush(self):
+        messages, self.pending = self.pending, []
+        if not messages:
+            return
+        try:
+            # one ioctl takes at most MAX_MESSAGES, each of them is a transfer
+            for i in range(0, len(messages), self.MAX_MESSAGES):
+                start = time.perf_counter()
+                self.bus.i2c_rdwr(*messages[i:i + self.MAX_MESSAGES])
+                elapsed = time.perf_counter() - start
+                self.transfers += 1
+                metrics.observe('oled_i2c_transfer_seconds', elapsed)
+                metrics.inc('oled_i2c_transfers_total')
+        except OSError as e:
+            if e.errno in [errno.EREMOTEIO, errno.EIO]:
+                raise DeviceNotFoundError(f'I2C device not found on address: 0x{self.address:02X}')
+            raise
+        sent = sum(msg.len + 1 for msg in messages)
+        self.bytes += sent
+        metrics.inc('oled_i2c_bus_bytes_total', value=sent)
+
+    def cleanup(self):
+        if self.managed:
+            self.bus.close()
+
+class FrameExport:
+    """Publish every sent frame into a memory mapped file, readers never block the renderer.
+
+    File layout (little endian): 32 byte header followed by the 1 bpp frame,
+    rows of (width + 7) // 8 bytes, most significant bit is the leftmost
+    pixel, 1 is a lit pixel. Header fields:
+
+        magic   4s  b"OLFB"
+        version H   1
+        flags   H   bit 0 set while the display is on
+        width   H
+        height  H
+        seq     Q   odd while a frame is being written
+        time    d   unix time of the frame
+
+    Readers copy the frame and retry if seq was odd or changed meanwhile.
+    With `snapshot_socket` every connection to it gets a PNG of the current
+    frame, `path` may be None then.
+    """
+
+    HEADER = struct.Struct('<4sHHHHQd')
+    SEQ_OFFSET = 12
+    DATA_OFFSET = 32
+    FLAG_ON = 0x1
+
+    def __init__(self, path, width, height, snapshot_socket=None, socket_mode=0o660, socket_group=None):
+        import mmap
+        self.path = path
+        self.width = width
+        self.height = height
+        self.size = (width + 7) // 8 * height
+        self.flags = self.FLAG_ON
+        self.seq = 0
+        if path is None:
+            # snapshots only, nothing to share with other processes
+            self.mm = mmap.mmap(-1, self.DATA_OFFSET + self.size)
+        else:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                os.ftruncate(fd, self.DATA_OFFSET + self.size)
+                self.mm = mmap.mmap(fd, self.DATA_OFFSET + self.size)
+            finally:
+                os.close(fd)
+        self.HEADER.pack_into(self.mm, 0, b"OLFB", 1, self.flags, width, height, self.seq, time.time())
+
+        self.snapshot_socket = snapshot_socket
+        self.server = None
+        if snapshot_socket:
+            self.server = SocketServer(snapshot_socket, self.handle, "FrameExport", mode=socket_mode, group=socket_group)
+
+    def __write(self, data=None):
+        # seqlock: odd seq tells readers the frame is incomplete
+        self.seq += 1
+        struct.pack_into('<Q', self.mm, self.SEQ_OFFSET, self.seq)
+        if data is not None:
+            self.mm[self.DATA_OFFSET:self.DATA_OFFSET + self.size] = data
+        struct.pack_into('<H', self.mm, 6, self.flags)
+        struct.pack_into('<d', self.mm, self.SEQ_OFFSET + 8, time.time())
+        self.seq += 1
+        struct.pack_into('<Q', self.mm, self.SEQ_OFFSET, self.seq)
+
+    def publish(self, image):
+        self.__write(image.tobytes())
+
+    def set_on(self, on):
+        self.flags = self.flags | self.FLAG_ON if on else self.flags & ~self.FLAG_ON
+        self.__write()
+
+    @classmethod
+    def read(cls, mm, retries=100):
+        """Consistent (seq, flags, time, Image) from mapped export, None if writer was always busy."""
+        for _ in range(retries):
+            magic, version, flags, width, height, seq, ftime = cls.HEADER.unpack_from(mm, 0)
+            if seq % 2:
+                time.sleep(0.001)
+                continue
+            size = (width + 7) // 8 * height
+            data = bytes(mm[cls.DATA_OFFSET:cls.DATA_OFFSET + size])
+            if struct.unpack_from('<Q', mm, cls.SEQ_OFFSET)[0] == seq:
+                return seq, flags, ftime, Image.frombytes('1', (width, height), data)
+        return None
+
+    def handle(self, conn):
+        import io
+        frame = self.read(self.mm)
+        if frame is None:
+            return
+        seq, flags, ftime, image = frame
+        if not flags & self.FLAG_ON:
+            # display is off, show what the viewer sees
+            image = Image.new('1', image.size)
+        png = io.BytesIO()
+        image.save(png, format='PNG')
+        conn.sendall(png.getvalue())
 
-                # initialize to default state
-                self.screen.init_calls()
+    def close(self):
+        if self.server:
+            self.server.stop()
+        # mapped file stays, readers see the last frame
+        self.mm.close()
+
+class FrameDiff:
+    """Send only changed pages / column ranges of a frame to the OLED controller."""
+
+    # unchanged columns cheaper to resend than to start a new window
+    MERGE_GAP = 8
+
+    def __init__(self, device):
+        self.device = device
+        self.width = device.width
+        self.height = device.height
+        self.pages = device.height // 8
+        self.invalidate()
+
+    def invalidate(self):
+        # controller RAM content after device.clear() is all zeroes
+        self.last_pages = [bytes(self.width)] * self.pages
+
+    def batch(self):
+        """Join device writes made inside, when serial interface supports it."""
+        serial = getattr(self.device, '_serial_interface', None)
+        return serial.batch() if isinstance(serial, I2CTransport) else nullcontext()
+
+    def __set_window(self, page, col_start, col_end):
+        if isinstance(self.device, sh1106):
+            # SH1106 supports page addressing mode only
+            col = col_start + self.device._page_address_offset
+            self.device.command(0xB0 | page, col & 0x0F, 0x10 | (col >> 4))
+            return 4
+        colstart = getattr(self.device, '_colstart', 0)
+        self.device.command(0x21, colstart + col_start, colstart + col_end - 1, 0x22, page, page)
+        return 7
+
+    def __changed_runs(self, last, data):
+        changed = [col for col in range(self.width) if data[col] != last[col]]
+        runs = []
+        start = end = changed[0]
+        for col in changed[1:]:
+            if col - end > self.MERGE_GAP:
+                runs.append((start, end + 1))
+                start = col
+            end = col
+        runs.append((start, end + 1))
+        return runs
+
+    def __scrolled(self, scroll, new_pages):
+        """Return controller command moving columns of pages one column left and RAM content after it."""
+        first_page, last_page, col_start, col_end = scroll
+        if isinstance(self.device, ssd1309):
+            # content scroll with column range
+            colstart = getattr(self.device, '_colstart', 0)
+            cmd = (0x2D, 0x00, first_page, 0x01, last_page, 0x00, colstart + col_start, colstart + col_end - 1)
+        else:
+            # SSD1306 scrolls whole page width
+            cmd = (0x2D, 0x00, first_page, 0x01, last_page, 0x00, 0xFF)
+            col_start, col_end = 0, self.width
+        pages = list(self.last_pages)
+        for page in range(first_page, last_page + 1):
+            last = bytearray(pages[page])
+            last[col_start:col_end - 1] = last[col_start + 1:col_end]
+            # content of the vacated column is not known, force rewrite
+            last[col_end - 1] = new_pages[page][col_end - 1] ^ 0xFF
+            pages[page] = bytes(last)
+        return cmd, pages
+
+    def __cost(self, last_pages, new_pages):
+        """I2C bytes needed to turn last_pages into new_pages."""
+        window = 4 if isinstance(self.device, sh1106) else 7
+        cost = 0
+        for last, data in zip(last_pages, new_pages):
+            if last != data:
+                for col_start, col_end in self.__changed_runs(last, data):
+                    cost += window + col_end - col_start + 1
+        return cost
+
+    def to_pages(self, image):
+        # rotating the 1-bit image makes PIL pack 8 vertical pixels per byte,
+        # which is exactly the controller page layout (LSB is the top row)
+        data = image.transpose(Image.Transpose.ROTATE_270).tobytes()
+        return [data[self.pages - 1 - page::self.pages] for page in range(self.pages)]
+
+    def __send(self, new_pages, scroll):
+        sent = 0
+        if scroll and isinstance(self.device, ssd1306):
+            cmd, pages = self.__scrolled(scroll, new_pages)
+            # scroll only when repairing what else moved is cheaper than redrawing
+            if len(cmd) + 1 + self.__cost(pages, new_pages) < self.__cost(self.last_pages, new_pages):
+                self.device.command(*cmd)
+                sent += len(cmd) + 1
+                self.last_pages = pages
+        for page, data in enumerate(new_pages):
+            last = self.last_pages[page]
+            if last == data:
                 continue
 
+            runs = self.__changed_runs(last, data)
+            for col_start, col_end in runs:
+                sent += self.__set_window(page, col_start, col_end)
+                self.device.data(list(data[col_start:col_end]))
+                sent += col_end - col_start + 1
+            self.last_pages[page] = data
+        return sent
+
+    def display(self, image, scroll=None):
+        """Send changed part of image, `scroll` is (first page, last page, first column, end column)
+        moved one column left since the last frame, done by the controller on SSD1306 / SSD1309."""
+        start = time.perf_counter()
+        image = self.device.preprocess(image)
+        if image.mode != '1':
+            image = image.convert('1')
+
+        new_pages = self.to_pages(image)
+        # whole frame in one bus transfer
+        with self.batch():
+            sent = self.__send(new_pages, scroll)
+
+        metrics.observe('oled_i2c_flush_seconds', time.perf_counter() - start)
+        metrics.inc('oled_i2c_bytes_total', value=sent)
+        metrics.inc('oled_frames_total')
+        if sent:
+            logger.debug(f"FrameDiff: sent {sent} bytes")
+        return sent
+
+class EventChannel:
+    """Thread-safe queue of display state changes from the log watcher to the renderer.
+
+    Messages are (kind, value) tuples:
+        ('call', Call), ('tg', tgnum), ('node', None), ('connected', None),
+        ('disconnected', None), ('start', None), ('config', settings)
+    Bursts are coalesced on post, so the renderer applies only the latest
+    relevant state.
+    """
+
+    # these reinitialize calls and current TG
+    RESETS = ('connected', 'disconnected', 'start')
+    # these overwrite reflector connection flag
+    CONNECTION = ('node', 'connected', 'disconnected')
+
+    def __init__(self, maxlen=256):
+        self.lock = threading.Lock()
+        self.queue = deque(maxlen=maxlen)
+
+    def post(self, kind, value=None):
+        with self.lock:
+            if kind in self.RESETS:
+                superseded = ('call', 'tg')
+                if kind != 'start':
+                    superseded += self.CONNECTION + ('start',)
+                self.__drop(lambda m: m[0] in superseded)
+            elif kind == 'tg':
+                self.__drop(lambda m: m[0] == 'tg')
+            elif kind in ('node', 'config'):
+                self.__drop(lambda m: m[0] == kind)
+            elif kind == 'call':
+                # calls are filtered by TG on render, keep latest one per TG
+                self.__drop(lambda m: m[0] == 'call' and m[1].tgnum == value.tgnum)
+            self.queue.append((kind, value))
+
+    def __drop(self, superseded):
+        kept = [m for m in self.queue if not superseded(m)]
+        if len(kept) != len(self.queue):
+            self.queue.clear()
+            self.queue.extend(kept)
+
+    def drain(self):
+        with self.lock:
+            messages = list(self.queue)
+            self.queue.clear()
+        return messages
+
+class TextCache:
+    """LRU cache of rasterized 1-bit text images, keyed by (text, font size, subpixel x).
+
+    Drawing cached text is a bitmap paste instead of FreeType rendering,
+    output is pixel identical to ImageDraw.text().
+    """
+
+    def __init__(self, font_file, max_bytes=64*1024):
+        self.font_file = font_file
+        self.fonts = {}
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.images = OrderedDict()
+        self.widths = OrderedDict()
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = ImageFont.truetype(self.font_file, size)
+            self.fonts[size] = font
+        return font
+
+    def textlength(self, text, size):
+        key = (text, size)
+        w = self.widths.get(key)
+        if w is None:
+            w = self.font(size).getlength(text, mode='1')
+            self.widths[key] = w
+            if len(self.widths) > 256:
+                self.widths.popitem(last=False)
+        else:
+            self.widths.move_to_end(key)
+        return w
+
+    def __render(self, text, size, frac):
+        font = self.font(size)
+        left, top, right, bottom = font.getbbox(text, mode='1')
+        # 1 px margin, subpixel start may move glyphs by a pixel
+        image = Image.new('1', (max(right - left + 2, 1), max(bottom - top, 1)))
+        ImageDraw.Draw(image).text((frac - left + 1, -top), text, font=font, fill=255)
+        return image, left - 1, top
+
+    def draw(self, draw, xy, text, size):
+        x, y = xy
+        frac = math.modf(x)[0]
+        key = (text, size, frac)
+        entry = self.images.get(key)
+        if entry is None:
+            metrics.inc('oled_text_cache_lookups_total', ('miss',))
+            entry = self.__render(text, size, frac)
+            self.images[key] = entry
+            self.size += len(entry[0].tobytes())
+            while self.size > self.max_bytes and len(self.images) > 1:
+                _, (image, _, _) = self.images.popitem(last=False)
+                self.size -= len(image.tobytes())
+        else:
+            metrics.inc('oled_text_cache_lookups_total', ('hit',))
+            self.images.move_to_end(key)
+        image, offset_x, offset_y = entry
+        draw.bitmap((int(x) + offset_x, int(y) + offset_y), image, fill=255)
+
+class Marquee:
+    """Message line too long for the screen, rendered once into a strip and moved through a window."""
+
+    GAP = 24
+
+    def __init__(self, text_cache, text, size, box, background, start):
+        x0, y0, x1, y1 = box
+        self.box = box
+        self.background = background
+        self.start = start
+        self.offset = None
+        # text twice, so every window position is a single crop
+        self.period = math.ceil(text_cache.textlength(text, size)) + self.GAP
+        self.strip = Image.new('1', (self.period + x1 - x0, y1 - y0))
+        draw = ImageDraw.Draw(self.strip)
+        text_cache.draw(draw, (0, 0), text, size)
+        text_cache.draw(draw, (self.period, 0), text, size)
+        # pages with text pixels, only these need to be scrolled
+        bbox = self.strip.getbbox() or (0, 0, 0, 1)
+        self.pages = ((y0 + bbox[1]) // 8, (y0 + bbox[3] - 1) // 8)
+
+    def window(self, offset):
+        x0, y0, x1, y1 = self.box
+        return self.strip.crop((offset, 0, offset + x1 - x0, y1 - y0))
+
+class Widget:
+    """Area of the screen with its font and options, from "x, y, width, height, key=value, ..." spec."""
+
+    # all options are checked when the layout is read, not on first render
+    INTS = ('font', 'y', 'font2', 'lines')
+    # "a:b/c:d" options and number of values in each point
+    POINTS = {'at': 2, 'y2': 2, 'antenna': 2}
+
+    def __init__(self, name, spec):
+        parts = [part.strip() for part in spec.split(',')]
+        try:
+            x, y, width, height = (int(v) for v in parts[:4])
+            self.options = dict(part.split('=', 1) for part in parts[4:])
+            for option in self.INTS:
+                int(self.options.get(option, 0))
+            for option, size in self.POINTS.items():
+                if any(len(point) != size for point in self.points(option, [])):
+                    raise ValueError
+            # seconds between timed changes of content, 0 means event driven only
+            self.every = float(self.options.get('every', 0))
+        except ValueError:
+            raise ValueError(f"Invalid layout widget {name} = {spec}") from None
+        self.name = name
+        self.box = (x, y, x + width, y + height)
+        self.font = int(self.options.get('font', 12))
+        self.y = int(self.options.get('y', 0))
+
+    def points(self, option, default=None):
+        """Option in "a:b/c:d" form as list of int tuples."""
+        value = self.options.get(option)
+        if not value:
+            return default
+        return [tuple(int(v) for v in point.split(':')) for point in value.split('/')]
+
+    def flag(self, option, default=False):
+        return self.options.get(option, 'yes' if default else 'no').lower() in ('yes', 'true', 'on', '1')
+
+class Layout:
+    """Widget placement for one panel size, compiled once into positions used by the renderer.
+
+    Widgets: sensors (or sensors_ext with external temperature), line
+    (IP / TG), message (talker or clock). A widget missing from the layout
+    is not shown. [layout:name] config sections replace widgets of the
+    built-in layout of the panel size, empty value removes the widget.
+    """
+
+    LAYOUTS = {
+        '128x64': {
+            'sensors': "0, 0, 128, 16, font=14, at=16:38/68:88",
+            'sensors_ext': "0, 0, 128, 16, font=12, at=0:18/41:60/87:106, every=5",
+            'line': "0, 16, 128, 14, font=11, every=5",
+            'message': "0, 30, 128, 34, font=20, y=4, font2=14, y2=2:17, frame=yes, antenna=107:43, every=60",
+        },
+        '128x32': {
+            'sensors': "0, 0, 128, 16, font=14, at=16:38/68:88",
+            'sensors_ext': "0, 0, 128, 16, font=12, at=0:18/41:60/87:106, every=5",
+            'message': "0, 16, 110, 16, font=14, y=0, lines=1, antenna=112:16, every=60",
+        },
+        '128x128': {
+            'sensors': "0, 0, 128, 16, font=14, at=16:38/68:88",
+            'sensors_ext': "0, 0, 128, 16, font=12, at=0:18/41:60/87:106, every=5",
+            'line': "0, 18, 128, 14, font=11, every=5",
+            'message': "0, 34, 128, 94, font=32, y=28, font2=16, y2=22:52, frame=yes, antenna=109:75, every=60",
+        },
+    }
+
+    def __init__(self, width, height, widgets=None):
+        size = f"{width}x{height}"
+        specs = dict(self.LAYOUTS.get(size, {}))
+        specs.update(widgets or {})
+        # empty value removes widget of the built-in layout
+        specs = {name: spec for name, spec in specs.items() if spec.strip()}
+        if 'message' not in specs:
+            raise ValueError(f"No layout for {size} panel, message widget has to be defined")
+        self.width = width
+        self.height = height
+        # for comparing layouts on config reload
+        self.specs = specs
+        self.widgets = {name: Widget(name, spec) for name, spec in specs.items()}
+
+    @classmethod
+    def from_config(cls, config, name, width, height):
+        widgets = None
+        if name:
+            section = f"layout:{name}"
+            if not config.has_section(section):
+                raise ValueError(f"Layout section [{section}] not found")
+            widgets = dict(config.items(section))
+        return cls(width, height, widgets)
+
+    def sensors(self, count):
+        """Sensors widget for `count` values and (icon x, text x) of each of them."""
+        widget = self.widgets.get('sensors_ext' if count == 3 else 'sensors') or self.widgets.get('sensors')
+        if widget is None:
+            return None, []
+        slots = widget.points('at')
+        if not slots or len(slots) != count:
+            # evenly spread, icon followed by the value
+            x0, y0, x1, y1 = widget.box
+            step = (x1 - x0) // count
+            slots = [(x0 + i * step, x0 + i * step + 18) for i in range(count)]
+        return widget, slots
+
+class RenderScheduler:
+    """Block the render loop until an event arrives or the next timed change is due."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.event = threading.Event()
+        self.reasons = set()
+
+    def notify(self, reason):
+        with self.lock:
+            self.reasons.add(reason)
+        self.event.set()
+
+    def wait(self, timeout=None):
+        self.event.wait(timeout)
+        with self.lock:
+            self.event.clear()
+            reasons = self.reasons
+            self.reasons = set()
+        if not reasons:
+            reasons.add('timer')
+        return reasons
+
+class AsyncRenderScheduler:
+    """RenderScheduler for the asyncio runtime, notify() may be called from any thread."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.loop_thread = threading.get_ident()
+        self.event = asyncio.Event()
+        self.reasons = set()
+
+    def notify(self, reason):
+        if threading.get_ident() == self.loop_thread:
+            self.__notify(reason)
+        else:
+            self.loop.call_soon_threadsafe(self.__notify, reason)
+
+    def __notify(self, reason):
+        self.reasons.add(reason)
+        self.event.set()
+
+    async def wait(self, timeout=None):
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.event.clear()
+        reasons = self.reasons
+        self.reasons = set()
+        if not reasons:
+            reasons.add('timer')
+        return reasons
+
+class SystemInfo:
+    """Sensor samplers, IP addresses and TG names shared by all displays."""
+
+    def __init__(self, ext_temp_sensor=False, cpu_interval=5, temp_interval=10, ext_temp_interval=30,
+                 threaded=True):
+        self.listeners = []
+        # displays in idle state, polling stops when all of them are
+        self.lock = threading.Lock()
+        self.idle = set()
+        self.ips = ["---.---.---.---"]
+        self.threaded = threaded
+        # event loop of the asyncio runtime, sensors added on reload run on it
+        self.loop = None
+
+        self.sensors = {
+            'cpu': SensorSampler('cpu', read_cpu_load, cpu_interval, on_change=self.__on_sensor, threaded=threaded),
+            'temp': SensorSampler('temp', read_cpu_temp, temp_interval, on_change=self.__on_sensor, threaded=threaded),
+        }
+        self.ext_sensors = self.__find_ext_sensors(ext_temp_interval) if ext_temp_sensor else []
+
+        self.addresses = AddressCache(on_change=self.set_ips, threaded=threaded)
+        self.tgnames = TgNameIndex(on_change=lambda: self.notify('tgnames'), threaded=threaded)
+
+    def __find_ext_sensors(self, interval):
+        ext_sensors = []
+        for sensor_file in sorted(glob.glob("/sys/bus/w1/devices/28*/w1_slave")):
+            name = os.path.basename(os.path.dirname(sensor_file))
+            ext_sensors.append(SensorSampler(name, lambda f=sensor_file: read_w1_temp(f),
+                                             interval, on_change=self.__on_sensor, threaded=self.threaded))
+        logger.debug(f"Found {len(ext_sensors)} external temperature sensors")
+        return ext_sensors
+
+    def subscribe(self, notify):
+        self.listeners.append(notify)
+
+    def notify(self, reason):
+        for notify in self.listeners:
+            notify(reason)
+
+    def __on_sensor(self, name):
+        self.notify('sensor')
+
+    def set_ips(self, ips):
+        self.ips = ips if ips else ["---.---.---.---"]
+        self.notify('ip')
+
+    def configure(self, ext_temp_sensor, cpu_interval, temp_interval, ext_temp_interval):
+        """Apply reloaded sampling settings, external sensors are started or stopped only when needed."""
+        self.sensors['cpu'].set_interval(cpu_interval)
+        self.sensors['temp'].set_interval(temp_interval)
+        if ext_temp_sensor and not self.ext_sensors:
+            ext_sensors = self.__find_ext_sensors(ext_temp_interval)
+            with self.lock:
+                suspended = self.idle and len(self.idle) >= len(self.listeners)
+            if suspended:
+                for sensor in ext_sensors:
+                    sensor.suspend()
+            if self.loop:
+                for sensor in ext_sensors:
+                    asyncio.run_coroutine_threadsafe(sensor.run_async(), self.loop)
+            self.ext_sensors = ext_sensors
+        elif not ext_temp_sensor and self.ext_sensors:
+            ext_sensors, self.ext_sensors = self.ext_sensors, []
+            for sensor in ext_sensors:
+                sensor.stop()
+        for sensor in self.ext_sensors:
+            sensor.set_interval(ext_temp_interval)
+
+    async def run_async(self):
+        self.loop = asyncio.get_running_loop()
+        samplers = list(self.sensors.values()) + self.ext_sensors
+        await asyncio.gather(*(sensor.run_async() for sensor in samplers),
+                             self.addresses.run_async(), self.tgnames.run_async())
+
+    def suspend(self, screen):
+        """Mark display as idle, sensors and addresses are not polled while all displays are idle."""
+        with self.lock:
+            self.idle.add(screen)
+            if len(self.idle) < len(self.listeners):
+                return
+        logger.debug("SystemInfo: all displays idle, polling suspended")
+        for sensor in list(self.sensors.values()) + self.ext_sensors:
+            sensor.suspend()
+        self.addresses.suspend()
+
+    def resume(self, screen):
+        with self.lock:
+            if screen not in self.idle:
+                return
+            suspended = len(self.idle) >= len(self.listeners)
+            self.idle.discard(screen)
+        if not suspended:
+            return
+        logger.debug("SystemInfo: polling resumed")
+        for sensor in list(self.sensors.values()) + self.ext_sensors:
+            sensor.resume()
+        self.addresses.resume()
+
+    def stop(self):
+        for sensor in list(self.sensors.values()) + self.ext_sensors:
+            sensor.stop()
+        self.addresses.stop()
+        self.tgnames.stop()
+
 class Screen:
+    hardware_scroll = False
+    # display settings applied by configure() on config reload
+    RELOADABLE = ('contrast_normal_val', 'contrast_low_val', 'screensaver_time', 'ext_temp_sensor', 'marquee',
+                  'marquee_speed', 'max_fps', 'i2c_chunk_size', 'layout', 'framebuffer', 'snapshot_socket',
+                  'socket_mode', 'socket_group')
+
     def __init__(self, i2c_port=1, i2c_address=0x3C, screensaver_time=0,
-                 contrast_normal_val=128, contrast_low_val=5, ext_temp_sensor=False):
+                 contrast_normal_val=128, contrast_low_val=5, ext_temp_sensor=False,
+                 cpu_interval=5, temp_interval=10, ext_temp_interval=30, serial=None, profile=None,
+                 info=None, marquee="auto", marquee_speed=25, i2c_chunk_size=4096, max_fps=30,
+                 framebuffer=None, snapshot_socket=None, socket_mode=0o660, socket_group=None,
+                 width=128, height=64, layout=None):
+        self.oled_width = width
+        self.oled_height = height
         self.screensaver_time = screensaver_time
         self.contrast_normal_val = contrast_normal_val
         self.contrast_low_val = contrast_low_val
         self.ext_temp_sensor = ext_temp_sensor
+        self.cpu_interval = cpu_interval
+        self.temp_interval = temp_interval
+        self.ext_temp_interval = ext_temp_interval
+        self.marquee = marquee
+        self.marquee_speed = marquee_speed
+        # controller moves the text one column per step, software redraw moves it by few
+        self.hardware_scroll = marquee == "auto" and self.hardware_scroll
+        self.marquee_step = 1 if self.hardware_scroll else 4
+        self.marquees = []
+        self.scroll_hint = None
+        # frames closer than this are postponed, bus is shared with other devices
+        self.frame_interval = 1 / max_fps if max_fps else 0
+        self.last_frame = 0
 
         self.current_contrast = None
-
-        # fons
+        # display off, nothing is rendered or polled until next svxlink log event
+        self.idle = False
+        # last wake up by log event, screensaver time counts from it too
+        self.active_since = datetime.min
+        self.scheduler = RenderScheduler()
+        self.events = EventChannel()
+        self.stopping = False
+        self.thread = None
+        self.first_frame = threading.Event()
+
+        # fonts and icons are loaded on first use
         own_font= os.path.abspath(os.path.join(os.path.dirname(__file__),"fonts/Roboto-Light.ttf"))
-        self.font11 = ImageFont.truetype(own_font, 11)
-        self.font12 = ImageFont.truetype(own_font, 12)
-        self.font14 = ImageFont.truetype(own_font, 14)
-        self.font20 = ImageFont.truetype(own_font, 20)
-
-        # icons
-        self.cpu_icon = Image.open('icons/cpu.bmp').convert('1')
-        self.temp_icon  = Image.open('icons/temp.bmp').convert('1')
-        self.temp_home_icon = Image.open('icons/home.bmp').convert('1')
-        self.antenna_icon = Image.open('icons/antenna.bmp').convert('1')
-
-        serial = i2c(port=i2c_port, address=i2c_address)
-        self.device = self.driver(serial)
+        self.text_cache = TextCache(own_font)
+        self.icons = {}
+
+        # display first, so something is shown as soon as possible
+        if serial is None:
+            if issubclass(self.driver, dummy):
+                # nothing on the bus, frame is only exported
+                serial = noop()
+            else:
+                serial = I2CTransport(port=i2c_port, address=i2c_address, chunk_size=i2c_chunk_size)
+        self.device = self.driver(serial, width=width, height=height)
         self.contrast_normal()
         self.device.clear()
+        self.frame = FrameDiff(self.device)
+        self.export = None
+        # snapshot socket permissions, compared on config reload
+        self.socket_access = (socket_mode, socket_group)
+        if framebuffer or snapshot_socket:
+            self.export = FrameExport(framebuffer, self.oled_width, self.oled_height, snapshot_socket=snapshot_socket,
+                                      socket_mode=socket_mode, socket_group=socket_group)
+        if profile:
+            profile.mark('device init')
+
+        # single framebuffer reused for all frames, regions of it are
+        # redrawn over cached static background only when their content changes
+        self.__image = Image.new(self.device.mode, self.device.size)
+        self.draw = ImageDraw.Draw(self.__image)
+        vars(self).update(self.compile_layout(layout or Layout(width, height), ext_temp_sensor))
+        self.backgrounds = {}
+        self.background_variant = None
+        self.region_keys = {}
+        self.dirty = False
+        # call waiting for its frame to be sent, for log to display latency
+        self.shown_call = None
+
+        self.splash()
+        if profile:
+            profile.mark('splash')
 
-        self.ips = ["---.---.---.---"]
         self.init_calls()
-
-        self.tg_names = {}
-        self.tg_names_update_time = 0
+        # samplers are shared when more displays are driven from one process
+        self.own_info = info is None
+        if self.own_info:
+            info = SystemInfo(ext_temp_sensor=ext_temp_sensor, cpu_interval=cpu_interval,
+                              temp_interval=temp_interval, ext_temp_interval=ext_temp_interval)
+        self.info = info
+        self.info.subscribe(self.notify)
 
         self.reflector_connected_flag = False
         self.show_last = False
 
-        self.__canvas = False
-        self.redraw_oled() # initialize
-        self.draw.rectangle(self.device.bounding_box, outline=0, fill=0)
-        self.redraw_oled()
-
         self.contrast_lock()
 
+    def compile_layout(self, layout, ext_temp_sensor):
+        """Turn layout widgets into regions, positions and fonts used on every frame.
+
+        Returns renderer attributes, nothing is changed until they are applied.
+        """
+        sensor_icons = ['cpu', 'temp', 'home'][:3 if ext_temp_sensor else 2]
+        sensors_widget, sensor_slots = layout.sensors(len(sensor_icons))
+        line_widget = layout.widgets.get('line')
+        message = layout.widgets['message']
+
+        regions = {'box': message.box}
+        plan = []
+        if line_widget:
+            regions['line'] = line_widget.box
+            plan.append(('ip_or_tg', self.update_ip_or_tg))
+        if sensors_widget:
+            regions['top'] = sensors_widget.box
+            plan.append(('temp_and_load', self.update_temp_and_load))
+        plan.append(('talkers_or_time', self.update_talkers_or_time))
+        plan.append(('marquee', self.update_marquees))
+
+        x0, y0, x1, y1 = message.box
+        message_frame = message.flag('frame')
+        inset = 2 if message_frame else 0
+        font2 = int(message.options.get('font2', message.font))
+        antenna = message.points('antenna')
+        antenna = antenna[0] if antenna else None
+        return {
+            'layout': layout,
+            'sensor_icons': sensor_icons,
+            'sensors_widget': sensors_widget,
+            'sensor_slots': sensor_slots,
+            'line_widget': line_widget,
+            'message_widget': message,
+            'regions': regions,
+            'plan': plan,
+            # shown widgets changing with time, for next_redraw_in
+            'timed_widgets': [w for w in (line_widget, sensors_widget, message) if w and w.every],
+            'message_frame': message_frame,
+            'message_rows': int(message.options.get('lines', 2)),
+            'message_lines': {
+                1: [(y0 + message.y, message.font)],
+                2: [(y0 + y, font2) for y in (message.points('y2') or [(message.y, message.y + font2 + 1)])[0]],
+            },
+            'message_bottom': y1 - 1 if message_frame else y1,
+            'antenna': antenna,
+            # marquee window inside of the frame, left of the reflector icon when connected
+            'message_window': {
+                False: (x0 + inset, x1 - inset),
+                True: (x0 + inset, antenna[0] - 2 if antenna else x1 - inset),
+            },
+        }
+
     def contrast_normal(self):
         if self.current_contrast != self.contrast_normal_val:
             self.device.contrast(self.contrast_normal_val)
@@ -249,13 +2350,16 @@ class Screen:
             self.current_contrast = self.contrast_low_val
 
     def contrast_lock(self):
-        self.contrast_locked = datetime.now()
+        # monotonic time when the display may be dimmed again
+        self.contrast_locked = time.monotonic() + 60
 
     def check_contrast_lock(self):
-        if self.contrast_locked:
-            tdiff = datetime.now() - self.contrast_locked
-            if tdiff > timedelta(minutes=1):
-                self.contrast_locked = False
+        if self.contrast_locked and time.monotonic() >= self.contrast_locked:
+            self.contrast_locked = False
+
+    def batch(self):
+        """Collect device writes made inside into one I2C transfer."""
+        return self.frame.batch()
 
     def reflector_connected(self, clean_calls=True):
         self.reflector_connected_flag = True
@@ -272,117 +2376,367 @@ class Screen:
         # initialize to default state
         self.init_calls()
 
+    def post(self, kind, value=None):
+        """Queue state change from another thread and wake up the renderer."""
+        self.events.post(kind, value)
+        self.notify(kind)
+
+    def apply_events(self):
+        """Apply queued state changes, called from the render thread only.
+
+        Returns True if any of them should wake up blanked display.
+        """
+        events = self.events.drain()
+        for kind, value in events:
+            if kind == 'call':
+                self.calls.append(value)
+            elif kind == 'tg':
+                self.current_tg = value
+            elif kind == 'node':
+                self.reflector_connected(clean_calls=False)
+            elif kind == 'connected':
+                self.reflector_connected()
+            elif kind == 'disconnected':
+                self.reflector_disconnected()
+            elif kind == 'start':
+                self.init_calls()
+            elif kind == 'config':
+                self.configure(**value)
+        # other nodes joining and leaving the reflector don't wake the display,
+        # reloaded config only when the screensaver doesn't apply anymore
+        if any(kind == 'config' for kind, value in events) and self.idle and not self.save_screen():
+            return True
+        return any(kind not in ('node', 'config') for kind, value in events)
+
+    def configure(self, contrast_normal_val, contrast_low_val, screensaver_time, ext_temp_sensor,
+                  marquee, marquee_speed, max_fps, i2c_chunk_size, layout, framebuffer, snapshot_socket,
+                  socket_mode, socket_group):
+        """Apply reloaded settings, called from the render thread only.
+
+        New layout and frame export are built first, nothing is changed if
+        that fails. Unchanged regions aren't sent to the display again.
+        """
+        relayout = (ext_temp_sensor != self.ext_temp_sensor or marquee != self.marquee
+                    or layout.specs != self.layout.specs)
+        framebuffer, snapshot_socket = framebuffer or None, snapshot_socket or None
+        current_export = (self.export.path, self.export.snapshot_socket) if self.export else (None, None)
+        reexport = ((framebuffer, snapshot_socket) != current_export
+                    or snapshot_socket and (socket_mode, socket_group) != self.socket_access)
+        try:
+            compiled = self.compile_layout(layout, ext_temp_sensor) if relayout else None
+            export = None
+            if reexport and (framebuffer or snapshot_socket):
+                export = FrameExport(framebuffer, self.oled_width, self.oled_height, snapshot_socket=snapshot_socket,
+                                     socket_mode=socket_mode, socket_group=socket_group)
+        except (ValueError, OSError) as e:
+            logger.error(f"Screen: config reload failed, keeping current config: {e}")
+            return
+
+        dimmed = self.current_contrast == self.contrast_low_val != self.contrast_normal_val
+        self.contrast_normal_val = contrast_normal_val
+        self.contrast_low_val = contrast_low_val
+        # current level is sent again if its value changed
+        if dimmed:
+            self.contrast_low()
+        else:
+            self.contrast_normal()
+        self.screensaver_time = screensaver_time
+        self.marquee_speed = marquee_speed
+        self.frame_interval = 1 / max_fps if max_fps else 0
+        serial = self.device._serial_interface
+        if isinstance(serial, I2CTransport):
+            serial.chunk_size = max(i2c_chunk_size, 2)
+
+        if relayout:
+            self.ext_temp_sensor = ext_temp_sensor
+            self.marquee = marquee
+            self.hardware_scroll = marquee == "auto" and type(self).hardware_scroll
+            self.marquee_step = 1 if self.hardware_scroll else 4
+            self.marquees = []
+            self.scroll_hint = None
+            vars(self).update(compiled)
+            # whole frame is drawn again on the next render
+            self.backgrounds = {}
+            self.background_variant = None
+            self.region_keys = {}
+
+        if reexport:
+            self.socket_access = (socket_mode, socket_group)
+            if self.export:
+                self.export.close()
+            self.export = export
+            if export:
+                export.publish(self.__image)
+                export.set_on(not self.idle)
+        logger.debug("Screen: config reloaded")
+
+    def apply_initial_calls(self):
+        self.apply_events()
+        last_tg_current_call = None
+        for call in self.calls:
+            if call.tgnum == self.current_tg:
+                last_tg_current_call = call
+        # leave only last entry for a group
+        if last_tg_current_call:
+            self.calls = [ last_tg_current_call ]
+
+    def get_state(self):
+        call = self.current_call
+        return {
+            'current_tg': self.current_tg,
+            'reflector_connected': self.reflector_connected_flag,
+            'call': {
+                'caller': call.caller,
+                'tgnum': call.tgnum,
+                'state': call.state,
+                'entrytime': call.entrytime.isoformat(),
+            },
+        }
+
+    def restore_state(self, state):
+        call = state['call']
+        tgname = self.get_tgname(call['tgnum']) if call['caller'] else None
+        self.current_call = Call(caller=call['caller'], tgnum=call['tgnum'], tgname=tgname,
+                                 state=call['state'], entrytime=datetime.fromisoformat(call['entrytime']))
+        self.current_tg = int(state['current_tg'])
+        self.reflector_connected_flag = bool(state['reflector_connected'])
+
     def init_calls(self):
         self.calls = []
         self.current_call = Call(caller=None, tgnum=0, tgname=None, state='stop', entrytime = datetime.now())
         self.current_tg = 0
 
-    def __update_tgnames(self):
-        tgfile = Path("/var/www/html/include/tgdb.json")
-        if tgfile.exists():
-            try:
-                tgmtime = tgfile.stat().st_mtime
-                if tgmtime > self.tg_names_update_time:
-                    with tgfile.open(encoding='utf-8') as f:
-                        self.tg_names = json.load(f)
-                        self.tg_names_update_time = tgmtime
-            except JSONDecodeError as e:
-                pass
-
     def get_tgname(self, tg):
         tg = int(tg)
         if tg == 0:
             return "Brak aktywnej grupy"
         if tg >= 26099900:
             return "AUTO QSY"
-        self.__update_tgnames()
-        if str(tg) in self.tg_names:
-            tgn = re.sub(r'[^a-zA-Z0-9ążźśćęńłóĄŻŹŚĆĘŃŁÓ:,\-\s]',"",self.tg_names[str(tg)])
-            # limit characters
-            return str(tgn)[:18]
-        return "Nieznana"
+        return self.info.tgnames.get(tg, "Nieznana")
+
+    def notify(self, reason):
+        self.scheduler.notify(reason)
+
+    def next_redraw_in(self):
+        """Seconds until something on the screen changes without a log event, None if nothing does."""
+        now = time.time()
+        # clock minute rollover, IP / TG line alternation etc. come from
+        # layout widgets, sensor changes are notified by SensorSampler
+        deadlines = [60 - now % 60]
+        deadlines += [w.every - now % w.every for w in self.timed_widgets]
+
+        ips = self.info.ips
+        if self.line_widget and self.__showing_ip(now) and len(ips) > 1:
+            time_per_ip = 60 / len(ips)
+            deadlines.append(time_per_ip - now % 60 % time_per_ip)
+
+        entry = self.current_call.entrytime.timestamp()
+        if self.show_last and self.current_call.state != 'start':
+            deadlines.append(entry + 5 - now)
+        if self.screensaver_time:
+            since = max(self.current_call.entrytime, self.active_since).timestamp()
+            deadlines.append(since + self.screensaver_time - now)
+        if self.contrast_locked:
+            deadlines.append(self.contrast_locked - time.monotonic())
+        if self.marquees:
+            elapsed = (time.monotonic() - self.marquees[0].start) * self.marquee_speed
+            deadlines.append((self.marquee_step - elapsed % self.marquee_step) / self.marquee_speed)
+
+        # deadlines already passed were handled by the current frame,
+        # wake up just after the boundary, not just before it
+        deadlines = [d for d in deadlines if d > 0]
+        return min(deadlines) + 0.01 if deadlines else None
 
     def save_screen(self):
         if not self.screensaver_time or len(self.calls):
-            self.device.show()
             return False
 
-        tdiff = datetime.now() - self.current_call.entrytime
-        if tdiff > timedelta(seconds=self.screensaver_time):
-            self.device.hide()
-            return True
-
-        self.device.show()
-        return False
-
-    def redraw_oled(self):
-        if self.__canvas:
-            self.__canvas.__exit__(None, None, None)
+        tdiff = datetime.now() - max(self.current_call.entrytime, self.active_since)
+        return tdiff > timedelta(seconds=self.screensaver_time)
+
+    def sleep(self):
+        """Switch display off once and stop polling shared by it."""
+        self.idle = True
+        self.device.hide()
+        if self.export:
+            self.export.set_on(False)
+        self.info.suspend(self)
+        logger.debug("Screen: display off, idle until next svxlink event")
+
+    def wake(self):
+        """Leave idle state, display is switched on after the next frame is sent."""
+        self.idle = False
+        # screensaver time counts from this event even if it isn't a new call
+        self.active_since = datetime.now()
+        self.info.resume(self)
+        self.contrast_lock()
+        self.contrast_normal()
+        logger.debug("Screen: display on")
 
-        self.__canvas = canvas(self.device)
-        self.draw = self.__canvas.__enter__()
+    def icon(self, name):
+        if name not in self.icons:
+            self.icons[name] = Image.open(f'icons/{name}.bmp').convert('1')
+        return self.icons[name]
 
-    def msg(self, msg, size):
-        fonts = {
-                    12: self.font12,
-                    14: self.font14,
-                    20: self.font20,
-                    }
+    def splash(self):
+        self.text_centered((self.oled_height - 16) // 2, "Uruchamianie...", 14)
+        self.frame.display(self.__image)
+        if self.export:
+            self.export.publish(self.__image)
 
-        if size not in fonts:
-            raise Exception(f"Invalid font size: {size} (supported sizes: {', '.join(fonts.keys())})")
+    def redraw_oled(self):
+        if not self.dirty:
+            return
+        self.frame.display(self.__image, scroll=self.scroll_hint)
+        if self.export:
+            self.export.publish(self.__image)
+        self.scroll_hint = None
+        self.dirty = False
+        if self.shown_call is not None:
+            # ignore calls replayed from old log or with clock skew
+            latency = (datetime.now() - self.shown_call.entrytime).total_seconds()
+            if 0 <= latency <= 60:
+                metrics.observe('oled_log_to_display_seconds', latency)
+            self.shown_call = None
+
+    def render(self):
+        """Render all screen sections and send changed part of frame to display."""
+        # lock expiring in this frame lets the clock dim the display right away
+        self.check_contrast_lock()
+        for section, update in self.plan:
+            start = time.perf_counter()
+            update()
+            metrics.observe('oled_render_seconds', time.perf_counter() - start, (section,))
+        self.redraw_oled()
 
+    def __build_background(self, variant):
+        """Draw static part of the layout, returns region crops of it."""
+        ext_temp_sensor, reflector_connected = variant
+        image = Image.new(self.device.mode, self.device.size)
+        draw = ImageDraw.Draw(image)
+        if self.sensors_widget:
+            y = self.sensors_widget.box[1]
+            for name, (icon_x, text_x) in zip(self.sensor_icons, self.sensor_slots):
+                draw.bitmap((icon_x, y), self.icon(name), fill="white")
+        if self.message_frame:
+            x0, y0, x1, y1 = self.message_widget.box
+            draw.rectangle([(x0, y0), (x1 - 1, y1 - 1)], outline="white", fill="black")
+        if reflector_connected and self.antenna:
+            # connection to reflector icon
+            draw.bitmap(self.antenna, self.icon('antenna'), fill="white")
+        return image, {name: image.crop(box) for name, box in self.regions.items()}
+
+    def region(self, name, key):
+        """Prepare region for drawing, returns False if it already shows content for key."""
+        variant = (bool(self.ext_temp_sensor), self.reflector_connected_flag)
+        if variant != self.background_variant:
+            if variant not in self.backgrounds:
+                self.backgrounds[variant] = self.__build_background(variant)
+            self.__image.paste(self.backgrounds[variant][0])
+            self.background_variant = variant
+            self.region_keys = {}
+            self.dirty = True
+
+        if self.region_keys.get(name) == key:
+            return False
+        box = self.regions[name]
+        self.__image.paste(self.backgrounds[variant][1][name], box[:2])
+        self.region_keys[name] = key
+        self.dirty = True
+        return True
+
+    def msg(self, msg):
+        """Show one or two lines in the message box, fonts and positions are from the layout."""
         if isinstance(msg, str):
             msg = [msg]
 
         msg_lines = len(msg)
         if msg_lines not in [1, 2]:
             raise Exception(f"Only 1 and 2 message lines are supported (got {msg_lines} lines).")
+        if msg_lines > self.message_rows:
+            # single row panel, both lines share it
+            msg = [" - ".join(msg)]
+            msg_lines = 1
+
+        if not self.region('box', tuple(msg)):
+            return
 
-        if msg_lines == 1:
-            self.draw.rectangle(self.shape, outline="white", fill="black")
-            w = self.draw.textlength(msg[0],font=fonts[size])
-            self.draw.text(((self.oled_width-w)/2,34), msg[0], font=fonts[size], fill=255)
+        self.marquees = []
+        start = time.monotonic()
+        lines = self.message_lines[msg_lines]
+        x0, x1 = self.message_window[self.reflector_connected_flag]
+        box_x0, _, box_x1, _ = self.message_widget.box
+        for i, ((y, size), line) in enumerate(zip(lines, msg)):
+            if self.marquee == "off" or self.text_cache.textlength(line, size) <= box_x1 - box_x0 - 2 * (x0 - box_x0):
+                self.text_centered(y, line, size, self.message_widget.box)
+                continue
+            y1 = lines[i + 1][0] if i + 1 < len(lines) else self.message_bottom
+            box = (x0, y, x1, y1)
+            background = self.backgrounds[self.background_variant][0].crop(box)
+            self.marquees.append(Marquee(self.text_cache, line, size, box, background, start))
+
+    def update_marquees(self, now=None):
+        """Move long message lines to their position for current time."""
+        now = time.monotonic() if now is None else now
+        moved = []
+        for m in self.marquees:
+            steps = int((now - m.start) * self.marquee_speed) // self.marquee_step
+            offset = steps * self.marquee_step % m.period
+            if offset == m.offset:
+                continue
+            # strip repeats the text, so wrap around is also a one column move
+            moved.append(m.offset is not None and (offset - m.offset) % m.period == 1)
+            self.__image.paste(m.background, m.box[:2])
+            self.draw.bitmap(m.box[:2], m.window(offset), fill=255)
+            m.offset = offset
+            self.dirty = True
+
+        # one controller scroll command for all lines, when all moved by exactly one column
+        if self.hardware_scroll and moved and all(moved):
+            self.scroll_hint = (min(m.pages[0] for m in self.marquees), max(m.pages[1] for m in self.marquees),
+                                self.marquees[0].box[0], self.marquees[0].box[2])
         else:
-            self.draw.rectangle(self.shape, outline="white", fill="black")
-            w = self.draw.textlength(msg[0], font=fonts[size])
-            self.draw.text(((self.oled_width-w)/2, 32), msg[0],  font=fonts[size], fill=255)
-            w = self.draw.textlength(msg[1], font=fonts[size])
-            self.draw.text(((self.oled_width-w)/2, 47), msg[1], font=fonts[size], fill=255)
+            self.scroll_hint = None
+
+    def frame_pages(self):
+        """Current framebuffer in controller page layout, for command stream verification."""
+        return self.frame.to_pages(self.device.preprocess(self.__image))
+
+    def text(self, xy, msg, size):
+        self.text_cache.draw(self.draw, xy, msg, size)
+
+    def text_centered(self, y, msg, size, box=None):
+        x0, _, x1, _ = box or (0, 0, self.oled_width, self.oled_height)
+        w = self.text_cache.textlength(msg, size)
+        self.text_cache.draw(self.draw, (x0 + (x1 - x0 - w) / 2, y), msg, size)
 
     def __update_time(self):
         self.contrast_low()
         current_time = datetime.now().strftime("%H:%M")
-        self.msg(current_time, 20)
-        self.__update_reflector_connected_icon()
+        self.msg(current_time)
 
     def __update_talker(self, call):
         self.contrast_normal()
-        self.msg([call.caller, call.tgname], size=14)
-        self.__update_reflector_connected_icon()
-
-    def __update_reflector_connected_icon(self):
-        self.svxlink_alive()
-        if self.reflector_connected_flag:
-            # connection to reflector icon
-            self.draw.bitmap((107, 43), self.antenna_icon, fill="white")
-
+        # name looked up again, tgdb.json may have been loaded after call was parsed
+        tgname = self.get_tgname(call.tgnum)
+        if self.marquee == "off":
+            # limit characters, long names are scrolled otherwise
+            tgname = tgname[:18]
+        self.msg([call.caller, tgname])
 
     def update_talkers_or_time(self):
-        talker_shown = False
-        if self.calls and len(self.calls):
-            while self.calls:
-                call = self.calls.pop(0)
-                if self.current_tg == 0 or call.tgnum == self.current_tg:
-                    self.__update_talker(call)
-                    talker_shown = True
-                    self.current_call = call
-                    self.contrast_lock()
-                    self.show_last = True
-
-        if talker_shown:
+        # only the latest call is visible, don't render the ones before it
+        calls = [call for call in self.calls if self.current_tg == 0 or call.tgnum == self.current_tg]
+        self.calls = []
+        if calls:
+            call = calls[-1]
+            self.__update_talker(call)
+            self.current_call = call
+            self.shown_call = call
+            self.contrast_lock()
+            self.show_last = True
             return
-        
+
         if self.current_call.state == 'start':
             self.__update_talker(self.current_call)
         else:
@@ -406,163 +2760,264 @@ class Screen:
               msg = f"{self.get_tgname(self.current_tg)}"
             else:
               msg = f"Aktywna TG: {self.current_tg}"
-        w = self.draw.textlength(msg, font=self.font11)
-        self.draw.text(((self.oled_width-w)/2, 16), msg, font=self.font11, fill=255)
+        self.__line(msg)
+
+    def __line(self, msg):
+        if self.region('line', msg):
+            widget = self.line_widget
+            self.text_centered(widget.box[1] + widget.y, msg, widget.font, widget.box)
 
     def __update_ip(self):
-        def __find_ips():
-            ips = []
-            ips4 = []
-            ips6 = []
-            nics = psutil.net_if_addrs()
-            for nic, addrs in nics.items():
-                if nic == "lo":
-                    continue
-                for addr in addrs:
-                    if addr.family not in [ socket.AF_INET, socket.AF_INET6 ]:
-                        continue
-                    # skip IPv6 link local addresses
-                    if '%' in addr.address:
-                        continue
-                    if addr.family == socket.AF_INET:
-                        ips4.append(addr.address)
-                    else:
-                        ips6.append(addr.address)
-            # prefer ipv4 and show ipv6 only if no ipv4 are available
-            if ips4:
-                ips = ips4
-            elif ips6:
-                ips = ips6
-            ips.sort()
-            if len(ips):
-                self.ips = ips
-            else:
-                self.ips = ["---.---.---.---"]
+        ips = self.info.ips
 
         def __get_ip_index_to_display():
-            time_per_ip = 60 / len(self.ips)
+            time_per_ip = 60 / len(ips)
             ip_index = datetime.now().second // time_per_ip
             return int(ip_index)
 
-        __find_ips()
         ip_index = __get_ip_index_to_display()
 
-        msg = self.ips[ip_index]
-        if len(self.ips) > 1:
-            msg += " (%d/%d)" % (ip_index + 1, len(self.ips))
+        msg = ips[ip_index]
+        if len(ips) > 1:
+            msg += " (%d/%d)" % (ip_index + 1, len(ips))
 
-        w = self.draw.textlength(msg, font=self.font11)
-        self.draw.text(((self.oled_width-w)/2, 16), msg, font=self.font11, fill=255)
+        self.__line(msg)
+
+    def __showing_ip(self, now):
+        # IP and TG take turns, each for `every` seconds
+        every = int(self.line_widget.every) or 5
+        return int(now) % (2 * every) < every
 
     def update_ip_or_tg(self):
-        current_second = int(time.time()) % 10
-        if current_second in range(5):
+        if self.__showing_ip(time.time()):
             self.__update_ip()
         else:
             self.__update_tg()
 
-    def update_temp_and_load(self):
-        def __get_cpu():
-            load1, load5, load15 = psutil.getloadavg()
-            cpu_usage = (load1/os.cpu_count()) * 100
-            return f'{str(int(float(cpu_usage))):>{2}}%'
+    def stop_samplers(self):
+        if self.own_info:
+            self.info.stop()
 
-        def __get_temp():
-            try:
-                with open("/sys/class/thermal/thermal_zone0/temp", "r", encoding='utf-8') as temp:
-                    return str(int(temp.read()[:2]))
-            except Exception as e:
-                return "?"
-
-        def __get_ext_temp():
-            if not self.ext_temp_sensor:
-                return False
-            sensors = glob.glob("/sys/bus/w1/devices/28*/w1_slave")
-            if not sensors:
+    def update_temp_and_load(self):
+        def __format(sensor, unit):
+            value, stale = sensor.get()
+            if value is None:
                 return "?"
-            # show temperature from first sensor only
-            sensor_file = sensors[0]
-            try:
-                fc = ""
-                with open(sensor_file, 'r', encoding='utf-8') as f:
-                          fc = f.read()
-                m = re.search(r't=(?P<temp>-?\d+)', fc)
-                if not m:
-                    return "?"
-                return str(int(float(m.group('temp')) / 1000.0))
-            except Exception as e:
-                logger.debug(f"__get_ext_temp() failed: {e}")
-            return "?"
-
-        ext_temp = __get_ext_temp()
-        if ext_temp:
-            self.draw.bitmap((0, 0), self.cpu_icon, fill="white")
-            msgc = __get_cpu()
-            self.draw.text((18, 0), msgc, font=self.font12, fill=255)
-            self.draw.bitmap((41, 0), self.temp_icon, fill="white")
-            msgt = __get_temp() + "C"
-            self.draw.text((60, 0), msgt, font=self.font12, fill=255)
-            self.draw.bitmap((87, 0), self.temp_home_icon, fill="white")
-            msgh = __get_ext_temp() + "C"
-            self.draw.text((106, 0), msgh, font=self.font12, fill=255)
+            # mark values not refreshed in time
+            return value + ("?" if stale else unit)
+
+        sensors = self.info.sensors
+        ext_sensors = self.info.ext_sensors
+
+        def __get_ext_sensor():
+            # rotate between all sensors every few seconds
+            every = int(self.sensors_widget.every) or 5
+            ext_index = int(time.time()) // every % len(ext_sensors)
+            return ext_sensors[ext_index]
+
+        # icons are part of static background
+        if self.ext_temp_sensor:
+            values = (__format(sensors['cpu'], "%"), __format(sensors['temp'], "C"),
+                      __format(__get_ext_sensor(), "C") if ext_sensors else "?")
         else:
-            self.draw.bitmap((16, 0), self.cpu_icon, fill="white")
-            msgc = __get_cpu()
-            self.draw.text((38, 0), msgc, font=self.font14, fill=255)
-            self.draw.bitmap((68, 0), self.temp_icon, fill="white")
-            msgt = __get_temp() + "°C"
-            self.draw.text((88, 0), msgt, font=self.font14, fill=255)
-            
-    def svxlink_alive(self):
-        def __is_svxlink_alive():
-            """Check if the svxlink process is running using the subprocess module."""
-            try:
-                # Run the `pgrep` command to search for processes named "svxlink"
-                result = subprocess.run(['pgrep', 'svxlink'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                # If pgrep finds the process, it will return a non-empty result in stdout
-                return result.returncode == 0
-            except Exception as e:
-                logger.debug(f"An error occurred: {e}")
-                return False
-        if not __is_svxlink_alive():
-            self.reflector_disconnected()
+            values = (__format(sensors['cpu'], "%"), __format(sensors['temp'], "°C"))
+        if self.region('top', values):
+            widget = self.sensors_widget
+            y = widget.box[1] + widget.y
+            for value, (icon_x, text_x) in zip(values, self.sensor_slots):
+                self.text((text_x, y), value, widget.font)
+
+    def step(self):
+        """Apply queued events and render one frame, return seconds until the next one (None when blanked)."""
+        if not self.apply_events() and self.idle:
+            # sensor, address and TG name changes are not shown until display wakes up
+            return None
+        waking = self.idle
+        save_screen = not waking and self.save_screen()
+
+        logger.debug(f"Current TG: |{self.current_tg}|, Last Call: |{self.current_call}|, Pending calls: |{self.calls}|, Save screen: {save_screen}")
+
+        if save_screen:
+            # nothing to show until next event from svxlink log
+            self.sleep()
+            return None
+
+        if not waking:
+            wait = self.last_frame + self.frame_interval - time.monotonic()
+            if wait > 0:
+                return wait
+        self.last_frame = time.monotonic()
+        # contrast, new frame and display on go out in one transfer,
+        # old content is never shown after wake up
+        with self.batch():
+            if waking:
+                self.wake()
+            self.render()
+            if waking:
+                self.device.show()
+        if waking and self.export:
+            self.export.set_on(True)
+        return self.next_redraw_in()
+
+    def run(self):
+        """Render loop of one display, each display has its own thread so a slow bus doesn't delay others."""
+        try:
+            while not self.stopping:
+                timeout = self.step()
+                self.first_frame.set()
+                reasons = self.scheduler.wait(timeout)
+                logger.debug(f"Redraw reasons: {reasons}")
+        finally:
+            # don't leave startup waiting when render thread failed
+            self.first_frame.set()
+
+    async def run_async(self, on_first_frame=None):
+        """Render loop of one display in the asyncio runtime, I2C writes run in executor."""
+        loop = asyncio.get_running_loop()
+        self.scheduler = AsyncRenderScheduler(loop)
+        try:
+            while True:
+                timeout = await loop.run_in_executor(None, self.step)
+                if on_first_frame and not self.first_frame.is_set():
+                    on_first_frame()
+                self.first_frame.set()
+                reasons = await self.scheduler.wait(timeout)
+                logger.debug(f"Redraw reasons: {reasons}")
+        finally:
+            # notifications may still come after the event loop is closed
+            self.scheduler = RenderScheduler()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="Screen", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping = True
+        self.notify('stop')
+        if self.thread:
+            self.thread.join()
 
     def shutdown(self):
-        self.msg("Shutdown", 20)
-        self.redraw_oled()
-        time.sleep(2)
-        sys.exit(0)
+        self.stop_samplers()
+        self.msg("Shutdown")
+        with self.batch():
+            self.redraw_oled()
+            if self.idle:
+                self.device.show()
+        if self.export:
+            self.export.set_on(True)
+            self.export.close()
 
 class ScreenSH1106(Screen):
     driver = sh1106
-    oled_width = 128
-    oled_height = 64
-    shape = [(0, 30), (oled_width - 1, oled_height - 1)]
 
 class ScreenSSD1306(Screen):
     driver = ssd1306
-    oled_width = 128
-    oled_height = 64
-    shape = [(0, 30), (oled_width - 1, oled_height - 1)]
+    hardware_scroll = True
 
 class ScreenSSD1309(Screen):
     driver = ssd1309
-    oled_width = 128
-    oled_height = 64
-    shape = [(0, 30), (oled_width - 1, oled_height - 1)]
+    hardware_scroll = True
+
+class headless(dummy):
+    """1-bit dummy device, frames go only to the framebuffer export."""
+
+    def __init__(self, serial_interface=None, width=128, height=64, **kwargs):
+        super().__init__(width=width, height=height, mode='1', serial_interface=serial_interface, **kwargs)
+
+class ScreenHEADLESS(Screen):
+    driver = headless
+
+class ScreenGroup:
+    """Fan out svxlink state changes to all displays, log is parsed only once."""
+
+    def __init__(self, screens):
+        self.screens = screens
+
+    def post(self, kind, value=None):
+        for screen in self.screens:
+            screen.post(kind, value)
+
+    def notify(self, reason):
+        for screen in self.screens:
+            screen.notify(reason)
+
+    def apply_events(self):
+        for screen in self.screens:
+            screen.apply_events()
+
+    def apply_initial_calls(self):
+        for screen in self.screens:
+            screen.apply_initial_calls()
+
+    def get_state(self):
+        # all displays apply the same events, so they have the same state
+        return self.screens[0].get_state()
+
+    def restore_state(self, state):
+        for screen in self.screens:
+            screen.restore_state(state)
+
+    def get_tgname(self, tg):
+        return self.screens[0].get_tgname(tg)
+
+async def run_async(screens, svxlog, svxwatch, info, on_first_frame=None, on_reload=None):
+    """Run log tailing, sensors, process watch and rendering on one event loop until SIGTERM / SIGINT.
+
+    Metrics, history and snapshot socket servers and the sampling profiler
+    keep their own threads, they don't share state with the loop.
+    """
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    if on_reload:
+        loop.add_signal_handler(signal.SIGHUP, on_reload)
+
+    tasks = [asyncio.create_task(coro) for coro in (
+        svxlog.tailer.run_async(), svxwatch.run_async(), info.run_async(),
+        screens[0].run_async(on_first_frame), *(screen.run_async() for screen in screens[1:]))]
+    stopped = asyncio.create_task(stop.wait())
+    await asyncio.wait(tasks + [stopped], return_when=asyncio.FIRST_COMPLETED)
+
+    for task in tasks + [stopped]:
+        task.cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+class StartupProfile:
+    """Per-phase startup timing for --startup-profile."""
+
+    def __init__(self, start):
+        self.start = start
+        self.last = start
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        for phase, duration in self.phases:
+            print(f"{phase:<16} {duration * 1000:8.1f} ms")
+        print(f"{'total':<16} {(self.last - self.start) * 1000:8.1f} ms")
+
+class ConfigError(Exception):
+    """Missing or invalid option in the configuration file."""
 
 def load_config(config_path):
     config = configparser.ConfigParser()
 
     if not os.path.exists(config_path):
-        print(f"Error: Configuration file '{config_path}' does not exist.")
-        sys.exit(1)
+        raise ConfigError(f"Configuration file '{config_path}' does not exist.")
 
     try:
         config.read(config_path)
     except configparser.Error as e:
-        print(f"Error reading configuration file '{config_path}': {e}")
-        sys.exit(1)
+        raise ConfigError(f"Error reading configuration file '{config_path}': {e}")
 
     return config
 
@@ -577,90 +3032,323 @@ def get_config_value(config, option, value_type=str, section='oled', default=Non
         else:
             return config.get(section, option)
     except configparser.NoSectionError:
-        print(f"Error: Section '{section}' not found in the configuration file.", file=sys.stderr)
-        sys.exit(1)
+        raise ConfigError(f"Section '{section}' not found in the configuration file.")
     except configparser.NoOptionError:
         if default is not None:
             return default
-        print(f"Error: Option '{option}' not found in section '{section}'.", file=sys.stderr)
-        sys.exit(1)
+        raise ConfigError(f"Option '{option}' not found in section '{section}'.")
     except ValueError as e:
-        print(f"Error: Invalid value for option '{option}' in section '{section}': {e}", file=sys.stderr)
-        sys.exit(1)
-
-try:
-    svxlog = None
-    shutdown = False
-    signal.signal(signal.SIGTERM, shutdown_signal_handler)
-    signal.signal(signal.SIGINT, shutdown_signal_handler)
-
-    logger = logging.getLogger('oled')
-    formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    logger.setLevel(logging.WARNING)
-
-    config_file = 'oledsvx.ini'
-    config = load_config(config_file)
-
-    driver = get_config_value(config, 'driver', str)
-    i2c_port = get_config_value(config, 'i2c_port', int, default=1)
-    i2c_address = get_config_value(config, 'i2c_address', str, default="0x3C")
-    i2c_address = int(i2c_address, 16)
-    contrast_nor = get_config_value(config, 'contrast_nor', int)
-    contrast_low = get_config_value(config, 'contrast_low', int)
-    screensaver_time = get_config_value(config, 'screensaver_time', int, default=0)
-    ext_temp_sensor = get_config_value(config, 'ext_temp_sensor', bool)
-    debug = get_config_value(config, 'debug', bool, default=False)
-
-    supported_drivers = ["sh1106", "ssd1306", "ssd1309"]
-
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--debug", help="Show debugging information.", action="store_true", default=None)
-    args = parser.parse_args()
+        raise ConfigError(f"Invalid value for option '{option}' in section '{section}': {e}")
+
+def read_settings(config_path, args):
+    """Read and validate the whole configuration, raises ConfigError.
+
+    Command line options override the file, also on reload.
+    """
+    config = load_config(config_path)
+    settings = {
+        'cpu_interval': get_config_value(config, 'cpu_interval', float, default=5),
+        'temp_interval': get_config_value(config, 'temp_interval', float, default=10),
+        'ext_temp_interval': get_config_value(config, 'ext_temp_interval', float, default=30),
+        'state_file': get_config_value(config, 'state_file', str, default="/var/tmp/oledsvx.state"),
+        'metrics_file': get_config_value(config, 'metrics_file', str, default=""),
+        'metrics_socket': get_config_value(config, 'metrics_socket', str, default=""),
+        'metrics_interval': get_config_value(config, 'metrics_interval', float, default=15),
+        'sampling_profiler': get_config_value(config, 'sampling_profiler', bool, default=False),
+        'runtime': get_config_value(config, 'runtime', str, default="threads"),
+        'log_source': get_config_value(config, 'log_source', str, default="file"),
+        'logfile': get_config_value(config, 'logfile', str, default="/var/log/svxlink"),
+        'journal_unit': get_config_value(config, 'journal_unit', str, default="svxlink"),
+        'history_size': get_config_value(config, 'history_size', int, default=256),
+        'history_socket': get_config_value(config, 'history_socket', str, default=""),
+        'debug': get_config_value(config, 'debug', bool, default=False),
+    }
+    try:
+        settings['socket_mode'] = int(get_config_value(config, 'socket_mode', str, default="0660"), 8)
+    except ValueError as e:
+        raise ConfigError(f"Invalid socket_mode: {e}")
+    settings['socket_group'] = None
+    group = get_config_value(config, 'socket_group', str, default="")
+    if group:
+        import grp
+        try:
+            settings['socket_group'] = grp.getgrnam(group).gr_gid
+        except KeyError:
+            raise ConfigError(f"Unknown socket_group: {group}")
+    # defaults of [oled:name] sections
+    defaults = {
+        'driver': get_config_value(config, 'driver', str, default=""),
+        'size': get_config_value(config, 'size', str, default="128x64"),
+        'layout': get_config_value(config, 'layout', str, default=""),
+        'i2c_port': get_config_value(config, 'i2c_port', int, default=1),
+        'i2c_address': get_config_value(config, 'i2c_address', str, default="0x3C"),
+        'i2c_chunk_size': get_config_value(config, 'i2c_chunk_size', int, default=4096),
+        'max_fps': get_config_value(config, 'max_fps', float, default=30),
+        'contrast_nor': get_config_value(config, 'contrast_nor', int),
+        'contrast_low': get_config_value(config, 'contrast_low', int),
+        'screensaver_time': get_config_value(config, 'screensaver_time', int, default=0),
+        'ext_temp_sensor': get_config_value(config, 'ext_temp_sensor', bool),
+        'marquee': get_config_value(config, 'marquee', str, default="auto"),
+        'marquee_speed': get_config_value(config, 'marquee_speed', float, default=25),
+        'framebuffer': get_config_value(config, 'framebuffer', str, default=""),
+        'snapshot_socket': get_config_value(config, 'snapshot_socket', str, default=""),
+    }
+
+    supported_drivers = ["sh1106", "ssd1306", "ssd1309", "headless"]
 
     if args.debug is not None:
-        debug = args.debug
-
-    if debug:
-        logger.setLevel(logging.DEBUG)
-
-    if driver not in supported_drivers:
-        print("Unsupported driver: %s. Supported drivers are: %s" % (driver, supported_drivers), file=sys.stderr)
-        sys.exit(1)
-
-    driver_class_name = "Screen%s" % driver.upper()
-    driver_class = globals()[driver_class_name]
+        settings['debug'] = args.debug
+    if args.runtime:
+        settings['runtime'] = args.runtime
+    if settings['runtime'] not in ["threads", "asyncio"]:
+        raise ConfigError("Unsupported runtime: %s. Supported runtimes are: threads, asyncio" % settings['runtime'])
+    if settings['log_source'] not in ["file", "journal", "stream"]:
+        raise ConfigError("Unsupported log_source: %s. Supported sources are: file, journal, stream" % settings['log_source'])
+
+    # each [oled:name] section is one more display, options not set
+    # in it are taken from [oled], without such sections [oled] is the only display
+    settings['displays'] = []
+    for section in [s for s in config.sections() if s.startswith('oled:')] or ['oled']:
+        display = {
+            'section': section,
+            'driver': get_config_value(config, 'driver', str, section=section, default=defaults['driver']),
+            'i2c_port': get_config_value(config, 'i2c_port', int, section=section, default=defaults['i2c_port']),
+            'i2c_chunk_size': get_config_value(config, 'i2c_chunk_size', int, section=section, default=defaults['i2c_chunk_size']),
+            'max_fps': get_config_value(config, 'max_fps', float, section=section, default=defaults['max_fps']),
+            'contrast_normal_val': get_config_value(config, 'contrast_nor', int, section=section, default=defaults['contrast_nor']),
+            'contrast_low_val': get_config_value(config, 'contrast_low', int, section=section, default=defaults['contrast_low']),
+            'screensaver_time': get_config_value(config, 'screensaver_time', int, section=section, default=defaults['screensaver_time']),
+            'ext_temp_sensor': get_config_value(config, 'ext_temp_sensor', bool, section=section, default=defaults['ext_temp_sensor']),
+            'marquee': get_config_value(config, 'marquee', str, section=section, default=defaults['marquee']),
+            'marquee_speed': get_config_value(config, 'marquee_speed', float, section=section, default=defaults['marquee_speed']),
+            'size': get_config_value(config, 'size', str, section=section, default=defaults['size']),
+            'socket_mode': settings['socket_mode'],
+            'socket_group': settings['socket_group'],
+        }
+        # paths from [oled] get display name appended, each display needs its own
+        for option in ('framebuffer', 'snapshot_socket'):
+            value = get_config_value(config, option, str, section=section, default="")
+            if section != 'oled' and defaults[option] and not config.has_option(section, option):
+                value = f"{defaults[option]}.{section[len('oled:'):]}"
+            display[option] = value
+        if display['driver'] not in supported_drivers:
+            raise ConfigError("Unsupported driver: %s in [%s]. Supported drivers are: %s" % (display['driver'], section, supported_drivers))
+        if display['marquee'] not in ["auto", "software", "off"]:
+            raise ConfigError("Unsupported marquee: %s in [%s]. Supported values are: auto, software, off" % (display['marquee'], section))
+        display['driver_class'] = globals()["Screen%s" % display['driver'].upper()]
+        try:
+            display['i2c_address'] = int(get_config_value(config, 'i2c_address', str, section=section, default=defaults['i2c_address']), 16)
+            display['width'], display['height'] = (int(v) for v in display['size'].lower().split('x'))
+            display['layout'] = Layout.from_config(config, get_config_value(config, 'layout', str, section=section, default=defaults['layout']),
+                                                   display['width'], display['height'])
+        except ValueError as e:
+            raise ConfigError("Invalid I2C address, size or layout in [%s]: %s" % (section, e))
+        settings['displays'].append(display)
+    return settings
+
+def reload_settings():
+    """Apply changed configuration to the running displays and log monitor (SIGHUP).
+
+    Invalid configuration is logged and the running one is kept. Settings
+    needing new device, bus or log reader are reported and wait for restart.
+    """
+    global settings, exporter, profiler, history_server
+    try:
+        new = read_settings(config_file, args)
+    except ConfigError as e:
+        logger.error(f"Config reload failed, keeping current config: {e}")
+        return
+    old = settings
+    logger.setLevel(logging.DEBUG if new['debug'] else logging.WARNING)
+
+    for option in ('runtime', 'log_source', 'logfile', 'journal_unit'):
+        if new[option] != old[option]:
+            logger.warning(f"Config reload: {option} change needs restart")
+    if [d['section'] for d in new['displays']] != [d['section'] for d in old['displays']]:
+        logger.warning("Config reload: displays added, removed or renamed, change needs restart")
+    for screen, current, display in zip(screens, old['displays'], new['displays']):
+        if any(display[option] != current[option] for option in ('driver', 'size', 'i2c_port', 'i2c_address')):
+            logger.warning(f"Config reload: driver, size or I2C address change in [{display['section']}] needs restart")
+        screen.post('config', {option: display[option] for option in Screen.RELOADABLE})
+
+    info.configure(ext_temp_sensor=any(d['ext_temp_sensor'] for d in new['displays'][:len(screens)]),
+                   cpu_interval=new['cpu_interval'], temp_interval=new['temp_interval'],
+                   ext_temp_interval=new['ext_temp_interval'])
+    svxlog.state_file = new['state_file']
+    if new['history_size'] != old['history_size']:
+        history.resize(new['history_size'])
+
+    # services on local sockets are restarted only when their settings changed
+    try:
+        access = ('socket_mode', 'socket_group')
+        if any(new[option] != old[option] for option in ('metrics_file', 'metrics_socket', 'metrics_interval') + access):
+            if exporter:
+                exporter.stop()
+                exporter = None
+            if new['metrics_file'] or new['metrics_socket']:
+                exporter = MetricsExporter(textfile=new['metrics_file'] or None,
+                                           socket_path=new['metrics_socket'] or None,
+                                           interval=new['metrics_interval'], socket_mode=new['socket_mode'],
+                                           socket_group=new['socket_group'])
+        if any(new[option] != old[option] for option in ('history_socket',) + access):
+            if history_server:
+                history_server.stop()
+                history_server = None
+            if new['history_socket']:
+                history_server = HistoryServer(history, new['history_socket'], socket_mode=new['socket_mode'],
+                                               socket_group=new['socket_group'])
+    except OSError as e:
+        logger.error(f"Config reload: failed to open socket: {e}")
+    if new['sampling_profiler'] != old['sampling_profiler']:
+        if profiler:
+            profiler.stop()
+            profiler = None
+        if new['sampling_profiler']:
+            profiler = SamplingProfiler()
+
+    settings = new
+    logger.info(f"Config reloaded from {config_file}")
+
+if __name__ == "__main__":
+    try:
+        profile = StartupProfile(startup_time)
+        profile.mark('imports')
+        svxlog = None
+        svxwatch = None
+        exporter = None
+        profiler = None
+        history_server = None
+        info = None
+        screens = []
+        signal.signal(signal.SIGTERM, shutdown_signal_handler)
+        signal.signal(signal.SIGINT, shutdown_signal_handler)
+        # config reload is enabled once everything is running
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        logger.addHandler(console_handler)
+        logger.setLevel(logging.WARNING)
+
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--debug", help="Show debugging information.", action="store_true", default=None)
+        parser.add_argument("--startup-profile", help="Print startup time of each phase until first frame.", action="store_true")
+        parser.add_argument("--runtime", help="Concurrency model: threads or asyncio (default: from config).", choices=["threads", "asyncio"])
+        args = parser.parse_args()
+
+        config_file = 'oledsvx.ini'
+        try:
+            settings = read_settings(config_file, args)
+        except ConfigError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        if settings['debug']:
+            logger.setLevel(logging.DEBUG)
+
+        # asyncio runtime runs all components as tasks of one event loop
+        runtime = settings['runtime']
+        threaded = runtime == "threads"
+        displays = settings['displays']
+        profile.mark('config')
+
+        if settings['metrics_file'] or settings['metrics_socket']:
+            exporter = MetricsExporter(textfile=settings['metrics_file'] or None,
+                                       socket_path=settings['metrics_socket'] or None,
+                                       interval=settings['metrics_interval'], socket_mode=settings['socket_mode'],
+                                       socket_group=settings['socket_group'])
+        if settings['sampling_profiler']:
+            profiler = SamplingProfiler()
+
+        # sensors, addresses and TG names are read once for all displays
+        info = SystemInfo(ext_temp_sensor=any(d['ext_temp_sensor'] for d in displays),
+                          cpu_interval=settings['cpu_interval'], temp_interval=settings['temp_interval'],
+                          ext_temp_interval=settings['ext_temp_interval'], threaded=threaded)
+        for display in displays:
+            screens.append(display['driver_class'](
+                               i2c_port=display['i2c_port'], i2c_address=display['i2c_address'],
+                               i2c_chunk_size=display['i2c_chunk_size'], max_fps=display['max_fps'],
+                               screensaver_time=display['screensaver_time'],
+                               contrast_normal_val=display['contrast_normal_val'],
+                               contrast_low_val=display['contrast_low_val'],
+                               ext_temp_sensor=display['ext_temp_sensor'],
+                               marquee=display['marquee'], marquee_speed=display['marquee_speed'],
+                               width=display['width'], height=display['height'], layout=display['layout'],
+                               framebuffer=display['framebuffer'] or None,
+                               snapshot_socket=display['snapshot_socket'] or None,
+                               socket_mode=display['socket_mode'], socket_group=display['socket_group'],
+                               profile=profile if not screens else None, info=info))
+        profile.mark('screen init')
+        sc = screens[0] if len(screens) == 1 else ScreenGroup(screens)
+        history = TalkerHistory(size=settings['history_size'])
+        svxlog = SvxLogMonitor(screen=sc, logfile=settings['logfile'], source=settings['log_source'],
+                               journal_unit=settings['journal_unit'], state_file=settings['state_file'],
+                               threaded=threaded, history=history)
+        profile.mark('log scan')
+        svxwatch = SvxlinkWatcher(screen=sc, threaded=threaded)
+        if settings['history_socket']:
+            history_server = HistoryServer(history, settings['history_socket'], socket_mode=settings['socket_mode'],
+                                           socket_group=settings['socket_group'])
+
+        def first_frame():
+            profile.mark('first frame')
+            if args.startup_profile:
+                profile.report()
+
+        if runtime == "asyncio":
+            asyncio.run(run_async(screens, svxlog, svxwatch, info, on_first_frame=first_frame,
+                                  on_reload=reload_settings))
+        else:
+            # a crash on any thread stops the daemon with an error, systemd restarts it
+            failed_threads = []
+
+            def thread_failed(args):
+                threading.__excepthook__(args)
+                failed_threads.append(args.thread.name)
+                shutdown.set()
+
+            threading.excepthook = thread_failed
+            for screen in screens:
+                screen.start()
+            screens[0].first_frame.wait()
+            first_frame()
+
+            # config is reloaded on the main thread, it only waits for shutdown
+            signal.signal(signal.SIGHUP, lambda signum, frame: reload_settings())
+            shutdown.wait()
+            if failed_threads:
+                raise RuntimeError(f"Thread failed: {', '.join(failed_threads)}")
 
-    sc = driver_class(i2c_port=i2c_port, i2c_address=i2c_address,
-                      screensaver_time=screensaver_time, contrast_normal_val=contrast_nor,
-                      contrast_low_val=contrast_low, ext_temp_sensor=ext_temp_sensor)
-    svxlog = SvxLogMonitor(screen=sc)
+        svxlog.stop_monitoring()
+        for screen in screens:
+            screen.stop()
+        sc.apply_events()
+        svxlog.save_checkpoint()
+        svxwatch.stop()
+        if profiler:
+            profiler.stop()
+        if exporter:
+            exporter.stop()
+        if history_server:
+            history_server.stop()
+        info.stop()
+        for screen in screens:
+            screen.shutdown()
+        time.sleep(2)
+        sys.exit(0)
 
-    while True:
-        if shutdown:
+    except Exception as e:
+        if svxlog:
             svxlog.stop_monitoring()
-            sc.shutdown()
-
-        save_screen = sc.save_screen()
-
-        logger.debug(f"Current TG: |{sc.current_tg}|, Last Call: |{sc.current_call}|, Pending calls: |{sc.calls}|, Save screen: {save_screen}")
-
-        if save_screen:
-            time.sleep(0.5)
-            continue
-
-        sc.update_ip_or_tg()
-        sc.update_temp_and_load()
-        sc.update_talkers_or_time()
-        sc.check_contrast_lock()
-        sc.redraw_oled()
-        time.sleep(0.5)
-
-except Exception as e:
-    if svxlog:
-        svxlog.stop_monitoring()
-    raise
+        if svxwatch:
+            svxwatch.stop()
+        if exporter:
+            exporter.stop()
+        if history_server:
+            history_server.stop()
+        if info:
+            info.stop()
+        raise
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# offline benchmark and marquee test for oledsvx.py on emulated display,
+# no OLED, I2C bus or svxlink needed; options are read from oledsvx.ini
+#
+# python3 oledsvx_bench.py                  replay svxlink log, report performance
+# python3 oledsvx_bench.py --marquee-test   verify captured marquee command stream
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from datetime import datetime, timedelta
+
+from oledsvx import (Call, ConfigError, I2CTransport, SvxLogMonitor, logger, metrics,
+                     read_settings)
+
+class CaptureSerial:
+    """Stand-in for luma i2c interface, counts (and optionally records) what would go over the bus."""
+
+    def __init__(self, record=False):
+        self.bytes = 0
+        self.transactions = 0
+        self.stream = [] if record else None
+
+    def command(self, *cmd):
+        # control byte + commands
+        self.bytes += 1 + len(cmd)
+        self.transactions += 1
+        if self.stream is not None:
+            self.stream.append(('C', bytes(cmd)))
+
+    def data(self, data):
+        self.bytes += 1 + len(data)
+        self.transactions += 1
+        if self.stream is not None:
+            self.stream.append(('D', bytes(data)))
+
+    def cleanup(self):
+        pass
+
+class FakeSMBus:
+    """smbus2.SMBus stand-in recording I2C transactions, bus time is computed for `clock` Hz."""
+
+    def __init__(self, clock=100000):
+        self.clock = clock
+        self.transactions = []
+        self.bus_time = 0.0
+
+    def i2c_rdwr(self, *msgs):
+        messages = [(msg.addr, bytes(msg)) for msg in msgs]
+        self.transactions.append(messages)
+        # START, address byte, payload, STOP, every byte is 8 bits + ACK
+        self.bus_time += sum(len(buf) + 1 for _, buf in messages) * 9 / self.clock + 2 / self.clock
+
+    def close(self):
+        pass
+
+class ControllerEmulator:
+    """Display RAM of SH1106 / SSD1306 / SSD1309 rebuilt from captured command stream."""
+
+    # commands with arguments, all others are single byte
+    ARGS = {0x81: 1, 0x8D: 1, 0xA8: 1, 0xAD: 1, 0xD3: 1, 0xD5: 1, 0xD9: 1, 0xDA: 1, 0xDB: 1, 0xDC: 1}
+    SSD1306_ARGS = {0x20: 1, 0x21: 2, 0x22: 2, 0x26: 6, 0x27: 6, 0x29: 5, 0x2A: 5, 0xA3: 2,
+                    0x2C: 6, 0x2D: 6}
+
+    def __init__(self, controller, width=128, height=64, column_offset=0):
+        self.controller = controller
+        self.width = width
+        self.column_offset = column_offset
+        self.args = dict(self.ARGS)
+        if controller in ("ssd1306", "ssd1309"):
+            self.args.update(self.SSD1306_ARGS)
+        if controller == "ssd1309":
+            # content scroll has column range
+            self.args.update({0x2C: 7, 0x2D: 7})
+        ram_width = width + column_offset * 2
+        self.ram = [bytearray(ram_width) for _ in range(height // 8)]
+        self.horizontal = False
+        self.window = (0, ram_width - 1, 0, len(self.ram) - 1)
+        self.page = 0
+        self.col = 0
+
+    def feed(self, stream):
+        for kind, payload in stream:
+            if kind == 'C':
+                self.command(payload)
+            else:
+                self.data(payload)
+
+    def command(self, cmd):
+        i = 0
+        while i < len(cmd):
+            op = cmd[i]
+            args = cmd[i + 1:i + 1 + self.args.get(op, 0)]
+            i += 1 + len(args)
+            if op == 0x20 and self.controller != "sh1106":
+                self.horizontal = args[0] == 0x00
+            elif op == 0x21 and self.controller != "sh1106":
+                self.window = (args[0], args[1]) + self.window[2:]
+                self.col = args[0]
+            elif op == 0x22 and self.controller != "sh1106":
+                self.window = self.window[:2] + (args[0], args[1])
+                self.page = args[0]
+            elif op in (0x2C, 0x2D) and self.controller != "sh1106":
+                col_start, col_end = (args[5], args[6]) if len(args) == 7 else (0, self.width - 1)
+                for page in range(args[1], args[3] + 1):
+                    row = self.ram[page]
+                    part = row[col_start:col_end + 1]
+                    # content scroll wraps around the scrolled columns
+                    row[col_start:col_end + 1] = part[1:] + part[:1] if op == 0x2D else part[-1:] + part[:-1]
+            elif 0xB0 <= op <= 0xBF:
+                # 16 pages on 128x128 panels
+                self.page = op & 0x0F
+            elif op <= 0x0F:
+                self.col = (self.col & 0xF0) | op
+            elif 0x10 <= op <= 0x1F:
+                self.col = (self.col & 0x0F) | ((op & 0x0F) << 4)
+
+    def data(self, data):
+        col_start, col_end, page_start, page_end = self.window
+        for byte in data:
+            self.ram[self.page][self.col] = byte
+            self.col += 1
+            if self.horizontal and self.col > col_end:
+                self.col = col_start
+                self.page = page_start if self.page >= page_end else self.page + 1
+            elif not self.horizontal and self.col >= len(self.ram[self.page]):
+                self.col = len(self.ram[self.page]) - 1
+
+    def pages(self):
+        return [bytes(row[self.column_offset:self.column_offset + self.width]) for row in self.ram]
+
+def run_marquee_test(driver_class, seconds=10, capture=None, **screen_args):
+    """Scroll long talker message on emulated display and check that the captured
+    command stream leaves the same picture in display RAM as the rendered frames."""
+    serial = CaptureSerial(record=True)
+    sc = driver_class(serial=serial, **screen_args)
+    controller = driver_class.driver.__name__
+    emulator = ControllerEmulator(controller, sc.oled_width, sc.oled_height,
+                                  getattr(sc.device, '_page_address_offset', 0))
+    tg = 26012
+    sc.info.tgnames.names[tg] = "Ogolnopolska grupa rozmow krotkofalowcow"
+    sc.reflector_connected()
+    sc.calls.append(Call(caller="SP2XYZ-ND/MM", tgnum=tg, tgname=None, state='start', entrytime=datetime.now()))
+    sc.render()
+
+    start = time.monotonic()
+    frames = 0
+    mismatches = 0
+    init_bytes = serial.bytes
+    stream = list(serial.stream)
+    emulator.feed(serial.stream)
+    serial.stream.clear()
+    steps = int(seconds * sc.marquee_speed / sc.marquee_step)
+    for step in range(1, steps + 1):
+        sc.update_marquees(start + step * sc.marquee_step / sc.marquee_speed + 0.001)
+        sc.redraw_oled()
+        emulator.feed(serial.stream)
+        stream.extend(serial.stream)
+        serial.stream.clear()
+        frames += 1
+        if emulator.pages() != sc.frame_pages():
+            mismatches += 1
+    sc.stop_samplers()
+
+    if capture:
+        with open(capture, 'w', encoding='utf-8') as f:
+            for kind, payload in stream:
+                f.write(f"{kind} {payload.hex(' ')}\n")
+
+    scroll_bytes = serial.bytes - init_bytes
+    print(f"driver:           {controller} ({'hardware' if sc.hardware_scroll else 'software'} scroll)")
+    print(f"marquee lines:    {len(sc.marquees)}")
+    print(f"frames:           {frames}")
+    print(f"I2C bytes:        {scroll_bytes} total, {scroll_bytes / frames if frames else 0:.1f} per frame")
+    print(f"RAM mismatches:   {mismatches}")
+    return mismatches == 0
+
+def synthetic_svxlink_log(lines, start=None):
+    """Generate svxlink reflector log lines similar to busy reflector traffic."""
+    callers = ["SP2AM", "SP2ONG", "SQ2XYZ-M", "SR2ABC", "SP9QWE-P", "SO3XX"]
+    tgs = [260, 2602, 26023, 91]
+    start = start or datetime.now()
+    out = []
+    talker = None
+    for i in range(lines):
+        date = (start + timedelta(milliseconds=250 * i)).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        kind = i % 10
+        if kind in (0, 5):
+            if talker:
+                out.append(f"{date}: ReflectorLogic: Talker stop on TG #{talker[1]}: {talker[0]}")
+                talker = None
+            else:
+                talker = (callers[i % len(callers)], tgs[i % len(tgs)])
+                out.append(f"{date}: ReflectorLogic: Talker start on TG #{talker[1]}: {talker[0]}")
+        elif kind in (1, 6):
+            out.append(f"{date}: ReflectorLogic: Node {'joined' if kind == 1 else 'left'}: {callers[i % len(callers)]}")
+        elif kind == 2 and i % 100 == 2:
+            out.append(f"{date}: ReflectorLogic: Selecting TG #{tgs[i % len(tgs)]}")
+        elif kind == 3:
+            out.append(f"{date}: Rx1: The squelch is {'OPEN' if i % 2 else 'CLOSED'} (12.34)")
+        else:
+            out.append(f"{date}: Tx1: Turning the transmitter {'ON' if i % 2 else 'OFF'}")
+    return out
+
+def run_benchmark(driver_class, log_path=None, lines=20000, rate=50, fps=2, **screen_args):
+    """Replay svxlink log through SvxLogMonitor and Screen on emulated OLED, no hardware needed.
+
+    rate is log lines per second and fps rendered frames per second of replayed time,
+    the replay itself runs as fast as possible.
+    """
+    if log_path:
+        with open(log_path, 'r', encoding='utf-8') as f:
+            log_lines = f.read().splitlines()[:lines]
+    else:
+        log_lines = synthetic_svxlink_log(lines)
+
+    bus = FakeSMBus()
+    transport = I2CTransport(bus=bus, chunk_size=screen_args.pop('i2c_chunk_size', 4096))
+    sc = driver_class(serial=transport, **screen_args)
+    init_bytes = transport.bytes
+    init_transfers = transport.transfers
+    init_bus_time = bus.bus_time
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logfile = os.path.join(tmpdir, "svxlink")
+        open(logfile, 'w').close()
+        svxlog = SvxLogMonitor(screen=sc, logfile=logfile, watch=False)
+
+        lines_per_frame = max(1, int(rate / fps))
+        parse_time = 0
+        render_time = 0
+        render_cpu = 0
+        frames = 0
+        with open(logfile, 'a', encoding='utf-8') as log:
+            for i in range(0, len(log_lines), lines_per_frame):
+                log.write("\n".join(log_lines[i:i + lines_per_frame]) + "\n")
+                log.flush()
+
+                t = time.perf_counter()
+                svxlog.process()
+                parse_time += time.perf_counter() - t
+
+                t = time.perf_counter()
+                c = time.process_time()
+                sc.apply_events()
+                sc.render()
+                render_cpu += time.process_time() - c
+                render_time += time.perf_counter() - t
+                frames += 1
+        svxlog.close()
+    sc.stop_samplers()
+
+    i2c_bytes = transport.bytes - init_bytes
+    transfers = transport.transfers - init_transfers
+    bus_time = bus.bus_time - init_bus_time
+    print(f"log lines:        {len(log_lines)} ({lines_per_frame} per frame)")
+    print(f"lines/sec parsed: {len(log_lines) / parse_time if parse_time else 0:.0f}")
+    print(f"frames:           {frames}")
+    print(f"frames/sec:       {frames / render_time if render_time else 0:.1f}")
+    print(f"CPU per frame:    {render_cpu / frames * 1000 if frames else 0:.3f} ms")
+    print(f"I2C bytes:        {i2c_bytes} total, {i2c_bytes / frames if frames else 0:.1f} per frame")
+    print(f"I2C transfers:    {transfers} ({transfers / frames if frames else 0:.2f} per frame)")
+    print(f"I2C bus time:     {bus_time / frames * 1000 if frames else 0:.2f} ms per frame at 100 kHz")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark oledsvx on emulated display.")
+    parser.add_argument("--debug", help="Show debugging information.", action="store_true", default=None)
+    parser.add_argument("--log", help="Recorded svxlink log to replay (default: synthetic log).")
+    parser.add_argument("--lines", help="Number of log lines to replay (default: 20000).", type=int, default=20000)
+    parser.add_argument("--rate", help="Log lines per second of replayed time (default: 50).", type=float, default=50)
+    parser.add_argument("--fps", help="Frames per second of replayed time (default: 2).", type=float, default=2)
+    parser.add_argument("--metrics", help="Print collected metrics on exit.", action="store_true")
+    parser.add_argument("--marquee-test", help="Scroll long message on emulated display and verify captured I2C command stream.", action="store_true")
+    parser.add_argument("--capture", help="Write command stream captured by --marquee-test to file.")
+    # read_settings() also takes the --runtime option of oledsvx.py
+    parser.set_defaults(runtime=None)
+    args = parser.parse_args()
+
+    try:
+        settings = read_settings('oledsvx.ini', args)
+    except ConfigError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if settings['debug']:
+        logging.basicConfig(format='%(asctime)s %(levelname)s %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+        logger.setLevel(logging.DEBUG)
+    display = settings['displays'][0]
+
+    if args.marquee_test:
+        passed = run_marquee_test(display['driver_class'], capture=args.capture,
+                                  marquee=display['marquee'], marquee_speed=display['marquee_speed'],
+                                  width=display['width'], height=display['height'], layout=display['layout'])
+        return 0 if passed else 1
+
+    run_benchmark(display['driver_class'], log_path=args.log, lines=args.lines, rate=args.rate, fps=args.fps,
+                  screensaver_time=display['screensaver_time'], contrast_normal_val=display['contrast_normal_val'],
+                  contrast_low_val=display['contrast_low_val'], ext_temp_sensor=display['ext_temp_sensor'],
+                  i2c_chunk_size=display['i2c_chunk_size'], width=display['width'], height=display['height'],
+                  layout=display['layout'])
+    if args.metrics:
+        print(metrics.render(), end="")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
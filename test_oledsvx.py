@@ -0,0 +1,634 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# checks using emulated display from oledsvx_bench.py, no hardware needed
+# python3 -m unittest test_oledsvx  (or pytest)
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import re
+import signal
+import socket
+import tempfile
+import time
+import unittest
+
+from datetime import datetime, timedelta
+from luma.oled.device import ssd1306
+from PIL import Image, ImageDraw, ImageFont
+from unittest import mock
+
+import oledsvx
+from oledsvx_bench import CaptureSerial, FakeSMBus, run_benchmark, run_marquee_test
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class ScreenTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # fonts and icons are loaded relative to current directory
+        cwd = os.getcwd()
+        os.chdir(HERE)
+        self.addCleanup(os.chdir, cwd)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def screen(self, driver_class=oledsvx.ScreenSH1106, **screen_args):
+        sc = driver_class(serial=CaptureSerial(), **screen_args)
+        self.addCleanup(sc.stop_samplers)
+        return sc
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("timed out")
+            time.sleep(0.02)
+
+
+class BenchmarkTest(ScreenTestCase):
+
+    def test_replay_synthetic_log(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            run_benchmark(oledsvx.ScreenSH1106, lines=500, rate=50, fps=2)
+        report = dict(line.split(':', 1) for line in out.getvalue().splitlines())
+        self.assertEqual(report['log lines'].split()[0], '500')
+        self.assertEqual(int(report['frames']), 20)
+
+
+class ConfigTest(ScreenTestCase):
+
+    def read_settings(self, message):
+        with open(os.path.join(HERE, 'oledsvx.ini'), encoding='utf-8') as f:
+            text = f.read().replace('\nlayout =\n', '\nlayout = test\n')
+        path = os.path.join(self.tmpdir.name, 'oledsvx.ini')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"{text}\n[layout:test]\nmessage = {message}\n")
+        return oledsvx.read_settings(path, argparse.Namespace(debug=None, runtime=None))
+
+    def test_layout_options(self):
+        settings = self.read_settings("0, 16, 128, 48, font=32, antenna=110:30")
+        self.assertEqual(settings['displays'][0]['layout'].widgets['message'].points('antenna'), [(110, 30)])
+
+    def test_invalid_layout_option(self):
+        for message in ("0, 16, 128, 48, antenna=zz", "0, 16, 128, 48, font=big", "0, 16, 128"):
+            with self.subTest(message=message):
+                with self.assertRaises(oledsvx.ConfigError):
+                    self.read_settings(message)
+
+
+class ScreenTest(ScreenTestCase):
+
+    def test_next_redraw_without_every(self):
+        layout = oledsvx.Layout(128, 32, {'message': "0, 16, 110, 16, font=14, y=0, lines=1"})
+        sc = self.screen(width=128, height=32, layout=layout)
+        self.assertEqual(sc.timed_widgets, [])
+        # clock is still redrawn on the next minute
+        self.assertLessEqual(sc.step(), 60.01)
+
+
+class I2CTransportTest(ScreenTestCase):
+
+    def send_frame(self, chunk_size):
+        bus = FakeSMBus()
+        transport = oledsvx.I2CTransport(bus=bus, chunk_size=chunk_size)
+        framediff = oledsvx.FrameDiff(ssd1306(serial_interface=transport))
+        image = Image.frombytes('1', (128, 64), random.Random(1).randbytes(128 * 64 // 8))
+        bus.transactions.clear()
+        transfers = transport.transfers
+        framediff.display(image)
+        self.assertEqual(transport.transfers - transfers, len(bus.transactions))
+        messages = [buf for transaction in bus.transactions for _, buf in transaction]
+        data = b''.join(buf[1:] for buf in messages if buf[0] == 0x40)
+        self.assertEqual(data, b''.join(framediff.to_pages(image)))
+        return bus.transactions, messages
+
+    def test_one_transfer_per_frame(self):
+        transactions, messages = self.send_frame(4096)
+        self.assertEqual(len(transactions), 1)
+
+    def test_chunked_messages(self):
+        transactions, messages = self.send_frame(16)
+        self.assertTrue(all(len(buf) <= 16 for buf in messages))
+        self.assertTrue(all(len(transaction) <= oledsvx.I2CTransport.MAX_MESSAGES for transaction in transactions))
+        self.assertEqual(len(transactions), math.ceil(len(messages) / oledsvx.I2CTransport.MAX_MESSAGES))
+
+
+class MarqueeTest(ScreenTestCase):
+
+    def test_controller_ram_matches_frames(self):
+        # hardware scroll and window writes have to leave the rendered picture in display RAM
+        for driver_class in (oledsvx.ScreenSH1106, oledsvx.ScreenSSD1306, oledsvx.ScreenSSD1309):
+            for marquee in ("auto", "software"):
+                for height in (64, 32):
+                    with self.subTest(driver=driver_class.__name__, marquee=marquee, height=height):
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            passed = run_marquee_test(driver_class, seconds=3, marquee=marquee,
+                                                      width=128, height=height)
+                        self.assertTrue(passed)
+
+
+class EventRecorder:
+    """Screen stand-in keeping the events posted by SvxLogMonitor."""
+
+    def __init__(self):
+        self.events = []
+
+    def post(self, kind, value=None):
+        if kind == 'call':
+            value = (value.state, value.tgnum, value.caller, value.entrytime)
+        self.events.append((kind, value))
+
+    def get_tgname(self, tg):
+        return str(tg)
+
+    def apply_initial_calls(self):
+        pass
+
+
+class RegexParser:
+    """Line matching of the parser before the keyword dispatch, reference for its events."""
+
+    HEADER = r'^(?P<date>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:\.(?P<msecs>\d{3}))?: '
+    PATTERNS = (
+        ('call', re.compile(HEADER + r'ReflectorLogic: Talker (?P<state>(start|stop)) on TG #(?P<tgnum>\d+): (?P<caller>.*)')),
+        ('tg', re.compile(HEADER + r'ReflectorLogic: Selecting TG #(?P<tgnum>\d+)')),
+        ('node', re.compile(HEADER + r'ReflectorLogic: Node (joined|left)')),
+        ('connected', re.compile(HEADER + r'ReflectorLogic: Connection established')),
+        ('disconnected', re.compile(HEADER + r'ReflectorLogic: Disconnected from')),
+        ('disconnected', re.compile(HEADER + r'.* Shutting down application')),
+        ('start', re.compile(HEADER + r'Starting logic:')),
+    )
+
+    def events(self, lines):
+        events = []
+        for line in lines:
+            for kind, pattern in self.PATTERNS:
+                m = pattern.match(line)
+                if not m:
+                    continue
+                value = None
+                if kind == 'call':
+                    entrytime = datetime.strptime(f"{m.group('date')}.{m.group('msecs') or '000'}", '%Y-%m-%d %H:%M:%S.%f')
+                    value = (m.group('state'), int(m.group('tgnum')), m.group('caller'), entrytime)
+                elif kind == 'tg':
+                    value = int(m.group('tgnum'))
+                events.append((kind, value))
+                break
+        return events
+
+
+class ParserTest(ScreenTestCase):
+
+    MESSAGES = (
+        "ReflectorLogic: Talker start on TG #{tg}: {caller}",
+        "ReflectorLogic: Talker stop on TG #{tg}: {caller}",
+        "ReflectorLogic: Talker start on TG #{tg}: {caller} Shutting down application",
+        "ReflectorLogic: Talker start on TG #: {caller}",
+        "ReflectorLogic: Talker started on TG #{tg}: {caller}",
+        "ReflectorLogic:  Talker start on TG #{tg}: {caller}",
+        "ReflectorLogic: Talker garbage Shutting down application",
+        "ReflectorLogic: Selecting TG #{tg}",
+        "ReflectorLogic: Selecting TG #x{tg}",
+        "ReflectorLogic: Node joined: {caller}",
+        "ReflectorLogic: Node left: {caller}",
+        "ReflectorLogic: Node list: {caller}",
+        "ReflectorLogic: Connection established to 192.0.2.1:5300",
+        "ReflectorLogic: Connection refused",
+        "ReflectorLogic: Disconnected from 192.0.2.1:5300: Connection refused",
+        "ReflectorLogic: Disconnected",
+        "SIGTERM received. Shutting down application...",
+        "Shutting down application...",
+        "Starting logic: ReflectorLogic",
+        "SimplexLogic: Starting logic: x",
+        "Rx1: The squelch is OPEN (12.34)",
+        "",
+    )
+
+    def random_lines(self, rng, count):
+        when = datetime(2024, 12, 31, 23, 50, 0)
+        lines = []
+        for _ in range(count):
+            when += timedelta(milliseconds=rng.randint(1, 30000))
+            msg = rng.choice(self.MESSAGES).format(tg=rng.choice((0, 91, 260, 26023)),
+                                                   caller=rng.choice(("SP2AM", "SQ2XYZ-ND/MM", "SP2ŻÓŁ", "SR2A\r")))
+            header = rng.choice((f"{when:%Y-%m-%d %H:%M:%S}.{when.microsecond // 1000:03d}: ",
+                                 f"{when:%Y-%m-%d %H:%M:%S}: ", f"{when:%Y-%m-%d %H:%M:%S}.5: ",
+                                 f"{when:%Y-%m-%d %H:%M:%S}:", f"x{when:%Y-%m-%d %H:%M:%S}: ", ""))
+            lines.append(header + msg)
+        return lines
+
+    def monitor(self):
+        logfile = os.path.join(self.tmpdir.name, 'svxlink')
+        open(logfile, 'w').close()
+        recorder = EventRecorder()
+        monitor = oledsvx.SvxLogMonitor(screen=recorder, logfile=logfile, watch=False)
+        self.addCleanup(monitor.close)
+        return monitor, recorder
+
+    def test_matches_regex_parser(self):
+        rng = random.Random(7)
+        lines = self.random_lines(rng, 3000)
+        expected = RegexParser().events(lines)
+        self.assertGreater(len(expected), 500)
+        data = "".join(line + "\n" for line in lines).encode('utf-8')
+        for chunked in (False, True):
+            with self.subTest(chunked=chunked):
+                monitor, recorder = self.monitor()
+                pos = 0
+                while pos < len(data):
+                    # odd sizes split lines and multi-byte characters
+                    size = rng.randint(1, 300) if chunked else len(data)
+                    monitor.feed(data[pos:pos + size], {})
+                    pos += size
+                self.assertEqual(recorder.events, expected)
+
+    def test_partial_line(self):
+        monitor, recorder = self.monitor()
+        monitor.feed(b"2024-05-01 12:00:00.123: ReflectorLogic: Selecting TG #260\n"
+                     b"2024-05-01 12:00:01.000: ReflectorLogic: Talker start on TG #260: SP2", {})
+        self.assertEqual(recorder.events, [('tg', 260)])
+        # line is parsed once its newline arrives, with the whole caller
+        monitor.feed(b"AM\n", {})
+        self.assertEqual(recorder.events[1:], [('call', ('start', 260, "SP2AM", datetime(2024, 5, 1, 12, 0, 1)))])
+
+
+class TextCacheTest(ScreenTestCase):
+
+    def test_matches_imagedraw_text(self):
+        font_file = os.path.join(HERE, 'fonts', 'Roboto-Light.ttf')
+        # small cache, so evicted entries are rendered again
+        cache = oledsvx.TextCache(font_file, max_bytes=4096)
+        fonts = {}
+        rng = random.Random(3)
+        texts = ("12:34", "SP2AM", "SQ2XYZ-ND/MM", "TG: 26023", "Łódź Żółć", "Ogolnopolska", "45.1°C", "", "1")
+        for frame in range(500):
+            cached = Image.new('1', (128, 64))
+            direct = Image.new('1', (128, 64))
+            for _ in range(4):
+                text, size = rng.choice(texts), rng.choice((9, 10, 14, 18, 32))
+                # centered text starts at fractional x
+                xy = (rng.choice((0, 3, 17.5, 40.25, rng.uniform(-10, 120))), rng.randint(-4, 60))
+                cache.draw(ImageDraw.Draw(cached), xy, text, size)
+                font = fonts.setdefault(size, ImageFont.truetype(font_file, size))
+                ImageDraw.Draw(direct).text(xy, text, font=font, fill=255)
+            self.assertEqual(cached.tobytes(), direct.tobytes(), f"frame {frame}")
+
+
+class EventChannelTest(ScreenTestCase):
+
+    def view(self, sc):
+        """State the next frame is drawn from, calls are consumed by every render."""
+        calls = [call for call in sc.calls if sc.current_tg == 0 or call.tgnum == sc.current_tg]
+        sc.calls = []
+        return sc.current_tg, sc.reflector_connected_flag, calls[-1] if calls else None
+
+    def test_coalesced_ticks_match_applying_each_event(self):
+        rng = random.Random(5)
+        coalesced, reference = self.screen(), self.screen()
+        when = datetime(2024, 5, 1, 12, 0, 0)
+        for tick in range(2000):
+            for _ in range(rng.choice((0, 1, 1, 3, 10, 40))):
+                kind = rng.choices(('call', 'tg', 'node', 'connected', 'disconnected', 'start'), (40, 8, 10, 2, 2, 1))[0]
+                value = None
+                if kind == 'call':
+                    when += timedelta(seconds=1)
+                    value = oledsvx.Call(caller=rng.choice(("SP2AM", "SQ2XYZ")), tgnum=rng.choice((91, 260, 2602)),
+                                         tgname=None, state=rng.choice(('start', 'stop')), entrytime=when)
+                elif kind == 'tg':
+                    value = rng.choice((0, 260, 2602))
+                coalesced.post(kind, value)
+                # reference applies every event on its own, nothing to coalesce
+                reference.events.queue.append((kind, value))
+                reference.apply_events()
+            coalesced.apply_events()
+            self.assertEqual(self.view(coalesced), self.view(reference), f"tick {tick}")
+
+
+class CompositingTest(ScreenTestCase):
+
+    def full_redraw(self, reference, marquees):
+        """Frame of the reference screen drawn from scratch, its marquees start when the given ones did."""
+        starts = [m.start for m in marquees]
+        reference.backgrounds = {}
+        reference.background_variant = None
+        reference.region_keys = {}
+        marquee = oledsvx.Marquee
+        with mock.patch.object(oledsvx, 'Marquee', lambda *args: marquee(*args[:-1], starts.pop(0))):
+            reference.render()
+        return b''.join(reference.frame_pages())
+
+    def test_incremental_frames_match_full_redraw(self):
+        now = [1715000000.0]
+
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return cls.fromtimestamp(now[0])
+
+        clock = mock.Mock(wraps=time, time=lambda: now[0], monotonic=lambda: now[0])
+        for name, value in (('datetime', FrozenDatetime), ('time', clock)):
+            patcher = mock.patch.object(oledsvx, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        rng = random.Random(13)
+        callers = ("SP2AM", "SQ2XYZ", "SP2XYZ-VERYLONGSUFFIX/P", "SO2RADIOKLUBPOLITECHNIKI")
+        for driver_class, ext_temp_sensor in ((oledsvx.ScreenSH1106, False), (oledsvx.ScreenSSD1306, True)):
+            info = oledsvx.SystemInfo(threaded=False)
+            info.ext_sensors = [oledsvx.SensorSampler('28-test', lambda: '21.5', 30, threaded=False)]
+            sensors = list(info.sensors.values()) + info.ext_sensors
+            # sections are drawn in order from state changed by the ones before,
+            # so the reference gets the same events instead of redrawing the same screen twice
+            sc = self.screen(driver_class, info=info, ext_temp_sensor=ext_temp_sensor)
+            reference = self.screen(driver_class, info=info, ext_temp_sensor=ext_temp_sensor)
+            for step in range(300):
+                now[0] += rng.choice((0.05, 0.3, 1, 2, 6, 30))
+                for sensor in sensors:
+                    if rng.random() < 0.2:
+                        # values not refreshed for a while are shown as stale
+                        sensor.value = rng.choice(('5', '42', '100', None))
+                        sensor.timestamp = now[0]
+                if rng.random() < 0.05:
+                    info.ips = rng.choice((["192.168.1.10"], ["192.168.1.10", "10.0.0.1"]))
+                for _ in range(rng.choice((0, 0, 1, 3))):
+                    kind = rng.choices(('call', 'tg', 'connected', 'disconnected'), (10, 2, 1, 1))[0]
+                    value = None
+                    if kind == 'call':
+                        value = oledsvx.Call(caller=rng.choice(callers), tgnum=rng.choice((260, 2602)), tgname=None,
+                                             state=rng.choice(('start', 'stop')), entrytime=FrozenDatetime.now())
+                    elif kind == 'tg':
+                        value = rng.choice((0, 260, 2602))
+                    sc.post(kind, value)
+                    reference.post(kind, value)
+                sc.apply_events()
+                reference.apply_events()
+                sc.render()
+                incremental = b''.join(sc.frame_pages())
+                self.assertEqual(incremental, self.full_redraw(reference, sc.marquees),
+                                 f"{driver_class.__name__} step {step}")
+
+
+class FullParseMonitor(oledsvx.SvxLogMonitor):
+
+    def find_start_offset(self):
+        return 0
+
+
+class StartupScanTest(ScreenTestCase):
+
+    LINES = (
+        (40, "ReflectorLogic: Talker start on TG #{talker_tg}: {caller}"),
+        (40, "ReflectorLogic: Talker stop on TG #{talker_tg}: {caller}"),
+        (12, "ReflectorLogic: Selecting TG #{tg}"),
+        (8, "ReflectorLogic: Node joined: {caller}"),
+        (30, "Rx1: The squelch is OPEN (12.34)"),
+        (1, "ReflectorLogic: Connection established to 192.0.2.1:5300"),
+        (1, "ReflectorLogic: Disconnected from 192.0.2.1:5300: Connection refused"),
+        (1, "Starting logic: ReflectorLogic"),
+        (1, "SIGTERM received. Shutting down application..."),
+    )
+
+    def random_log(self, rng, count):
+        weights = [weight for weight, _ in self.LINES]
+        when = datetime(2024, 5, 1, 12, 0, 0)
+        out = []
+        for _ in range(count):
+            when += timedelta(milliseconds=rng.randint(1, 20000))
+            _, text = rng.choices(self.LINES, weights)[0]
+            # monitored TGs are busier than the selected one
+            text = text.format(tg=rng.choice((260, 2602)), talker_tg=rng.choices((260, 2602, 26023, 91), (1, 1, 6, 6))[0],
+                               caller=rng.choice(("SP2AM", "SQ2XYZ", "SR2ABC")))
+            out.append(f"{when:%Y-%m-%d %H:%M:%S}.{when.microsecond // 1000:03d}: {text}\n")
+        if rng.random() < 0.3:
+            # svxlink is in the middle of writing a line
+            out.append(out.pop()[:rng.randint(1, 40)])
+        return "".join(out)
+
+    def state(self, monitor_class, path, info, **monitor_args):
+        sc = oledsvx.ScreenSH1106(serial=CaptureSerial(), info=info)
+        monitor = monitor_class(screen=sc, logfile=path, watch=False, **monitor_args)
+        monitor.close()
+        calls = [(call.caller, call.tgnum, call.state) for call in sc.calls]
+        return sc.current_tg, sc.reflector_connected_flag, calls
+
+    def test_matches_full_forward_parse(self):
+        info = oledsvx.SystemInfo()
+        self.addCleanup(info.stop)
+        rng = random.Random(11)
+        path = os.path.join(self.tmpdir.name, 'svxlink')
+        for i in range(40):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.random_log(rng, rng.randint(20, 600)))
+            with self.subTest(log=i):
+                expected = self.state(FullParseMonitor, path, info)
+                self.assertEqual(self.state(oledsvx.SvxLogMonitor, path, info, scan_chunk=512), expected)
+
+    def test_unterminated_last_line(self):
+        info = oledsvx.SystemInfo()
+        self.addCleanup(info.stop)
+        path = os.path.join(self.tmpdir.name, 'svxlink')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("2024-05-01 12:00:00.000: ReflectorLogic: Connection established to 192.0.2.1:5300\n"
+                    "2024-05-01 12:00:01.000: ReflectorLogic: Selecting TG #260\n"
+                    "2024-05-01 12:00:02.000: ReflectorLogic: Talker start on TG #260: SP2AM\n"
+                    "2024-05-01 12:00:03.000: ReflectorLogic: Selecting TG #91\n"
+                    "2024-05-01 12:00:04.000: ReflectorLogic: Node joined: SR2ABC\n"
+                    "2024-05-01 12:00:05.000: ReflectorLogic: Talker start on TG #91: SQ2XYZ")
+        # the last talker line isn't complete, there is no talker on TG 91 yet
+        self.assertEqual(self.state(oledsvx.SvxLogMonitor, path, info), (91, True, [('SP2AM', 260, 'start')]))
+
+
+class TgNameIndexTest(ScreenTestCase):
+
+    def test_rebuild(self):
+        tgfile = os.path.join(self.tmpdir.name, 'tgdb.json')
+        index = oledsvx.TgNameIndex(tgfile, threaded=False)
+        for content, names in (('{"260": "Polska!", "x": "zla"}', {260: "Polska"}),
+                               ('[]', {260: "Polska"}), ('{"91": ', {260: "Polska"})):
+            with self.subTest(content=content):
+                with open(tgfile, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                # forced reload, invalid content keeps the last valid names
+                index.mtime = 0
+                index.rebuild()
+                self.assertEqual(index.names, names)
+
+
+class MetricsExporterTest(ScreenTestCase):
+
+    def test_textfile_written_while_socket_is_scraped(self):
+        textfile = os.path.join(self.tmpdir.name, 'oled.prom')
+        socket_path = os.path.join(self.tmpdir.name, 'oled.sock')
+        exporter = oledsvx.MetricsExporter(textfile=textfile, socket_path=socket_path, interval=0.5)
+        self.addCleanup(exporter.stop)
+        deadline = time.monotonic() + 1.5
+        while time.monotonic() < deadline and not os.path.exists(textfile):
+            with socket.socket(socket.AF_UNIX) as client:
+                client.connect(socket_path)
+                client.recv(65536)
+            time.sleep(0.1)
+        self.assertTrue(os.path.exists(textfile))
+
+
+class AsyncRuntimeTest(ScreenTestCase):
+
+    def test_log_to_screen_on_one_loop(self):
+        logfile = os.path.join(self.tmpdir.name, 'svxlink')
+        open(logfile, 'w').close()
+        info = oledsvx.SystemInfo(threaded=False)
+        sc = oledsvx.ScreenHEADLESS(width=128, height=64, info=info)
+        svxlog = oledsvx.SvxLogMonitor(screen=sc, logfile=logfile, threaded=False)
+        svxwatch = oledsvx.SvxlinkWatcher(screen=sc, threaded=False)
+        self.addCleanup(info.stop)
+        reloads = []
+
+        def first_frame():
+            loop = oledsvx.asyncio.get_running_loop()
+            with open(logfile, 'a') as log:
+                log.write(f"{datetime.now():%Y-%m-%d %H:%M:%S}.000: ReflectorLogic: Selecting TG #2602\n")
+            loop.call_later(0.3, os.kill, os.getpid(), signal.SIGHUP)
+            loop.call_later(1.5, os.kill, os.getpid(), signal.SIGTERM)
+
+        oledsvx.asyncio.run(oledsvx.run_async([sc], svxlog, svxwatch, info, on_first_frame=first_frame,
+                                              on_reload=lambda: reloads.append(True)))
+        svxlog.stop_monitoring()
+        svxwatch.stop()
+        self.assertEqual(sc.current_tg, 2602)
+        self.assertEqual(reloads, [True])
+
+
+class CountingTailer(oledsvx.LogTailer):
+
+    wakeups = 0
+
+    def handle(self):
+        self.wakeups += 1
+        super().handle()
+
+
+class LogTailerTest(ScreenTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.logfile = os.path.join(self.tmpdir.name, 'svxlink')
+        # unrelated log in the same directory, exists before the watch is set
+        self.other = os.path.join(self.tmpdir.name, 'messages')
+        for path in (self.logfile, self.other):
+            open(path, 'w').close()
+        self.recorder = EventRecorder()
+        self.monitor = oledsvx.SvxLogMonitor(screen=self.recorder, logfile=self.logfile, watch=False)
+        self.addCleanup(self.monitor.close)
+        self.tailer = CountingTailer(self.monitor)
+        self.addCleanup(self.tailer.stop)
+
+    def append(self, path, tg):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(f"2024-05-01 12:00:00.000: ReflectorLogic: Selecting TG #{tg}\n")
+
+    def wait_for_tg(self, tg):
+        self.wait_for(lambda: self.recorder.events[-1:] == [('tg', tg)])
+
+    def test_rotation(self):
+        self.append(self.logfile, 260)
+        self.wait_for_tg(260)
+
+        # logrotate renames the file, svxlink writes to the old one until it reopens the log
+        os.rename(self.logfile, self.logfile + '.1')
+        self.append(self.logfile + '.1', 261)
+        self.append(self.logfile, 262)
+        self.wait_for_tg(262)
+        self.append(self.logfile, 263)
+        self.wait_for_tg(263)
+
+        # copytruncate, new content is shorter than what was already read
+        os.truncate(self.logfile, 0)
+        self.append(self.logfile, 264)
+        self.wait_for_tg(264)
+        self.assertEqual([value for kind, value in self.recorder.events], [260, 261, 262, 263, 264])
+
+    def test_other_file_in_directory(self):
+        if self.tailer.fd is None:
+            self.skipTest("inotify not available, file is polled")
+        self.append(self.logfile, 260)
+        self.wait_for_tg(260)
+        wakeups = self.tailer.wakeups
+        for _ in range(10):
+            with open(self.other, 'a', encoding='utf-8') as f:
+                f.write("kernel: unrelated\n")
+        time.sleep(0.3)
+        self.assertEqual(self.tailer.wakeups, wakeups)
+        self.append(self.logfile, 261)
+        self.wait_for_tg(261)
+        self.assertGreater(self.tailer.wakeups, wakeups)
+
+
+class JournalReaderTest(ScreenTestCase):
+
+    def test_fifo_entries_and_checkpoint(self):
+        fifo = os.path.join(self.tmpdir.name, 'journal')
+        state_file = os.path.join(self.tmpdir.name, 'state')
+        os.mkfifo(fifo)
+        sc = self.screen()
+        monitor = oledsvx.SvxLogMonitor(screen=sc, source='journal', journal_command=['cat', fifo],
+                                        state_file=state_file)
+        self.addCleanup(monitor.stop_monitoring)
+        ts = int(time.time() * 1e6)
+        entries = [
+            {'__CURSOR': 's=1;i=1', '__REALTIME_TIMESTAMP': str(ts), 'MESSAGE': "ReflectorLogic: Selecting TG #260"},
+            # non UTF-8 messages come as byte arrays
+            {'__CURSOR': 's=1;i=2', '__REALTIME_TIMESTAMP': str(ts + 1000),
+             'MESSAGE': list(b"ReflectorLogic: Talker start on TG #260: SP2\xffQ")},
+        ]
+        with open(fifo, 'w') as journal:
+            for entry in entries:
+                journal.write(json.dumps(entry) + "\n")
+            # entry split between reads
+            journal.write('{"__CURSOR": "s=1;i=3", "MESS')
+            journal.flush()
+            self.wait_for(lambda: monitor.cursor == 's=1;i=2')
+            journal.write('AGE": "unrelated"}\n')
+            journal.flush()
+            self.wait_for(lambda: monitor.cursor == 's=1;i=3')
+
+        sc.apply_events()
+        self.assertEqual(sc.current_tg, 260)
+        self.assertEqual(sc.calls[-1].caller, "SP2\ufffdQ")
+        monitor.stop_monitoring()
+        monitor.save_checkpoint()
+        resumed = oledsvx.SvxLogMonitor(screen=sc, source='journal', state_file=state_file, watch=False)
+        self.assertEqual(resumed.cursor, 's=1;i=3')
+
+    def test_rejected_cursor(self):
+        journalctl = os.path.join(self.tmpdir.name, 'journalctl')
+        with open(journalctl, 'w') as f:
+            f.write("#!/bin/sh\n"
+                    "case \"$*\" in *--after-cursor*) echo 'Failed to seek to cursor: Invalid argument' >&2; exit 1;; esac\n"
+                    "echo '{\"__CURSOR\": \"s=1;i=9\", \"MESSAGE\": \"ReflectorLogic: Selecting TG #2602\"}'\n"
+                    "exec sleep 30\n")
+        os.chmod(journalctl, 0o755)
+
+        class FakeJournalReader(oledsvx.JournalReader):
+            def journal_command(self):
+                return [journalctl] + super().journal_command()[1:]
+
+        sc = self.screen()
+        monitor = oledsvx.SvxLogMonitor(screen=sc, source='journal', watch=False)
+        monitor.cursor = 's=1;i=1'
+        with self.assertLogs('oled', 'WARNING') as logs:
+            reader = FakeJournalReader(monitor, cursor=monitor.cursor, restart_delay=0.1)
+            self.addCleanup(reader.stop)
+            self.wait_for(lambda: monitor.cursor == 's=1;i=9')
+        self.assertIn("journal cursor rejected", "\n".join(logs.output))
+        self.assertIn('--lines', reader.journal_command())
+        sc.apply_events()
+        self.assertEqual(sc.current_tg, 2602)
+
+
+if __name__ == "__main__":
+    unittest.main()